@@ -3,21 +3,36 @@
 import os
 import sys
 import json
+import random
+import errno
 import re
 import shutil
+import tempfile
 import subprocess
 import argparse
+import atexit
+import shlex
 import platform
 import urllib.request
 import urllib.parse
 import urllib.error
-# tarfile and zipfile removed; using shell tools in AutoBuilder
+import http.client
+import base64
+import tarfile
+import zipfile
 import sqlite3
 from pathlib import Path
 import stat
 import time
 import logging
-from typing import Optional, List, Dict, Tuple, Union, Callable, Any, Set
+import functools
+import contextlib
+import mmap
+import selectors
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, Union, Callable, Any, Set, FrozenSet, Pattern, Iterator
 # Setup logger for Anvil; level can be overridden via ANVIL_LOG_LEVEL
 log_level = os.environ.get('ANVIL_LOG_LEVEL', 'INFO').upper()
 numeric_level = getattr(logging, log_level, logging.INFO)
@@ -31,10 +46,25 @@ INDEX_DIR = ANVIL_ROOT / "index"
 BUILD_DIR = ANVIL_ROOT / "build"
 INSTALL_DIR = ANVIL_ROOT / "opt"
 BIN_DIR = ANVIL_ROOT / "bin"
+# Local cache of GitHub release metadata (ETag-revalidated)
+RELEASE_CACHE_DB = ANVIL_ROOT / "cache.db"
+# Installed-package manifest, so "is X installed?" is one indexed lookup
+PACKAGES_DB = ANVIL_ROOT / "index.db"
+# Per-install list of the BIN_DIR shims/links created for it (read by uninstall)
+_SHIM_MANIFEST = ".anvil_shims"
 
 # The central registry of sources
 INDEX_REPO_URL = "https://github.com/sycomix/Anvil_Index.git"
 
+# Host platform, resolved once at import
+_PLATFORM = platform.system()
+_IS_WIN = os.name == 'nt'
+# Process umask, read once while still single-threaded (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+# pip of the interpreter running anvil, shared by every Python build plan
+_PIP_INSTALL = (sys.executable, "-m", "pip", "install")
+
 class Colors:
     """Console color helpers used for printing status messages."""
     HEADER = '\033[95m'
@@ -44,6 +74,9 @@ class Colors:
     FAIL = '\033[91m'
     ENDC = '\033[0m'
     BOLD = '\033[1m'
+    # Decided once at import: escape codes only on a POSIX terminal, so piped
+    # output and redirected logs stay plain
+    _USE_COLOR = not _IS_WIN and bool(sys.stdout and sys.stdout.isatty())
 
     @staticmethod
     def print(msg, color=ENDC, prefix="[ANVIL]"):
@@ -62,43 +95,215 @@ class Colors:
         except (ValueError, TypeError, OSError, UnicodeEncodeError):
             # Ensure that logging errors (encoding, type, OS issues) don't prevent console output
             pass
-        if os.name == 'nt':
-            print(f"{prefix} {msg}")
+        if Colors._USE_COLOR:
+            print(f"{color}{prefix} {msg}{Colors.ENDC}")
         else:
+            print(f"{prefix} {msg}")
+
+    @staticmethod
+    def detail(msg, *args, color=OKBLUE, prefix="[ANVIL]"):
+        """Per-item progress (each copied or linked file), shown only at DEBUG.
+
+        Takes %-style args so nothing is formatted unless it will be shown;
+        callers report a summary with Colors.print.
+        """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if args:
+            msg = msg % args
+        logger.debug("%s %s", prefix, msg)
+        if Colors._USE_COLOR:
             print(f"{color}{prefix} {msg}{Colors.ENDC}")
+        else:
+            print(f"{prefix} {msg}")
+
+    @staticmethod
+    def details(msg: str, items: List[str], color: str = OKBLUE, prefix: str = "[ANVIL]") -> None:
+        """Colors.detail for every item of a loop's local list, in one console write.
+
+        Per-file loops collect their item names and call this once afterwards,
+        so verbose runs do not pay one console write per line (slow terminals
+        make that the bottleneck).
+        """
+        if not items or not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = [msg % item for item in items]
+        for line in lines:
+            logger.debug("%s %s", prefix, line)
+        start, end = (color, Colors.ENDC) if Colors._USE_COLOR else ('', '')
+        sys.stdout.write("".join(f"{start}{prefix} {line}{end}\n" for line in lines))
+        sys.stdout.flush()
+
+# A build step is a shell command string, an argv list (run without a shell),
+# or a Python callable invoked as step(build_path, install_path).
+Command = Union[str, List[str]]
+BuildStep = Union[str, List[str], Callable[[Path, Path], None]]
 
 # --- Utilities ---
-def run_cmd(command: str, cwd: Optional[str] = None, shell: bool = True, verbose: bool = True, env: Optional[Dict[str, str]] = None) -> str:
-    """Run a shell command and return its stdout on success.
+def _command_text(command: Command) -> str:
+    """Render a command for log messages (argv lists are shell-quoted)."""
+    return command if isinstance(command, str) else shlex.join(command)
+
+
+@functools.lru_cache(maxsize=None)
+def _which(name: str) -> Optional[str]:
+    """shutil.which, memoized; PATH does not change during one anvil run."""
+    return shutil.which(name)
+
+
+def _resolve_argv(command: List[str]) -> List[str]:
+    """Resolve argv[0] via PATH (and PATHEXT on Windows).
+
+    Without a shell, CreateProcess does not find `npm.cmd`/`gradle.bat`
+    style launchers by bare name, so look them up explicitly.
+    """
+    if _IS_WIN and command:
+        found = _which(command[0])
+        if found:
+            return [found, *command[1:]]
+    return command
+
+
+# Characters that make a command string need /bin/sh (expansion, redirection,
+# chaining, globbing, escapes); strings without them are plain argv.
+_SHELL_META_RE = re.compile(r'[|&;<>()$`\\*?\[\]{}~!#\n]')
+# Builtins that only mean something inside the shell process
+_SHELL_BUILTINS = frozenset({'cd', '.', 'source', 'export', 'unset', 'set', 'alias', 'eval', 'exec', 'exit', 'ulimit', 'umask'})
+
+
+def _simple_argv(command: str, cwd: Optional[Union[str, Path]] = None, env: Optional[Dict[str, str]] = None) -> Optional[List[str]]:
+    """Split a shell string into argv when no shell is needed to run it, else None.
+
+    POSIX only: cmd.exe quoting is not shlex's, so Windows keeps the shell.
+    """
+    if _IS_WIN or _SHELL_META_RE.search(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    # Leading VAR=value assignments and builtins need the shell; so does a name
+    # that is not an executable on the child's PATH (functions, aliases, typos
+    # whose "not found" message should come from sh).
+    if not argv or '=' in argv[0] or argv[0] in _SHELL_BUILTINS:
+        return None
+    if os.sep in argv[0]:
+        # Path-qualified programs (./configure) are relative to the child's cwd
+        if not os.access(os.path.join(cwd or os.curdir, argv[0]), os.X_OK):
+            return None
+    elif shutil.which(argv[0], path=(env if env is not None else os.environ).get('PATH')) is None:
+        return None
+    return argv
+
+
+# Lines of stdout/stderr retained per command for diagnostics (e.g. linker errors)
+_OUTPUT_TAIL_LINES = 256
+_PIPE_READ_SIZE = 1 << 16
+
+
+def _drain_process(proc: "subprocess.Popen[bytes]", on_stdout: Callable[[str], None]) -> Tuple[str, str]:
+    """Read a child's stdout/stderr until EOF and return the tail of each.
+
+    stdout lines are forwarded to `on_stdout` as they arrive so long builds
+    produce live output, while memory stays bounded by _OUTPUT_TAIL_LINES
+    regardless of how much the child prints.
+    """
+    assert proc.stdout is not None and proc.stderr is not None
+    out_pipe, err_pipe = proc.stdout, proc.stderr
+    tails: Dict[Any, deque] = {out_pipe: deque(maxlen=_OUTPUT_TAIL_LINES), err_pipe: deque(maxlen=_OUTPUT_TAIL_LINES)}
+    partial: Dict[Any, bytes] = {out_pipe: b'', err_pipe: b''}
+
+    def feed(pipe: Any, data: bytes) -> None:
+        *lines, partial[pipe] = (partial[pipe] + data).split(b'\n')
+        for raw in lines:
+            line = raw.rstrip(b'\r').decode('utf-8', errors='replace')
+            tails[pipe].append(line)
+            if pipe is out_pipe:
+                on_stdout(line)
+
+    if _IS_WIN:
+        # select() only supports sockets on Windows; drain each pipe on its own thread
+        def pump(pipe: Any) -> None:
+            for chunk in iter(lambda: pipe.read1(_PIPE_READ_SIZE), b''):
+                feed(pipe, chunk)
+
+        readers = [threading.Thread(target=pump, args=(p,), daemon=True) for p in (out_pipe, err_pipe)]
+        for t in readers:
+            t.start()
+        for t in readers:
+            t.join()
+    else:
+        with selectors.DefaultSelector() as sel:
+            sel.register(out_pipe, selectors.EVENT_READ)
+            sel.register(err_pipe, selectors.EVENT_READ)
+            while sel.get_map():
+                for key, _ in sel.select():
+                    data = os.read(key.fd, _PIPE_READ_SIZE)
+                    if not data:
+                        sel.unregister(key.fileobj)
+                        continue
+                    feed(key.fileobj, data)
+
+    for pipe in (out_pipe, err_pipe):
+        if partial[pipe]:
+            feed(pipe, b'\n')
+    proc.wait()
+    return ''.join(f"{line}\n" for line in tails[out_pipe]), ''.join(f"{line}\n" for line in tails[err_pipe])
+
+
+def run_cmd(command: Command, cwd: Optional[Union[str, Path]] = None, shell: bool = True, verbose: bool = True, env: Optional[Dict[str, str]] = None) -> str:
+    """Run a command and return its stdout on success.
+
+    `command` may be a shell string or an argv list; argv lists always run
+    with shell=False, which avoids a /bin/sh (or cmd.exe) per step and any
+    quoting issues with paths containing spaces. Shell strings that use no
+    shell syntax are split and run the same way (see _simple_argv).
+
+    Output is streamed to the logger while the command runs; only the last
+    _OUTPUT_TAIL_LINES lines of stdout/stderr are kept for the return value
+    and for CommandExecutionError diagnostics.
 
     On failure, raises CommandExecutionError for command-specific failures or
     exits the process for non-git related OS/subprocess errors (legacy behavior).
     """
     try:
-        # Use run to capture output for diagnostics (esp. linker errors)
-        cp = subprocess.run(command, cwd=cwd, shell=shell, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
-        if cp.returncode == 0:
+        log_line = logger.info if verbose else logger.debug
+        argv: Command = command
+        if isinstance(command, str) and shell:
+            simple = _simple_argv(command, cwd, env)
+            if simple is not None:
+                argv, shell = simple, False
+        elif isinstance(command, list):
+            argv = _resolve_argv(command)
+            shell = False
+        with subprocess.Popen(argv, cwd=cwd, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env) as proc:
+            stdout, stderr = _drain_process(proc, lambda line: log_line("%s", line))
+        if proc.returncode == 0:
             if verbose:
                 # Print the command executed in verbose mode
-                Colors.print(f"Command succeeded: {command}")
-            return cp.stdout
+                Colors.print(f"Command succeeded: {_command_text(command)}")
+            return stdout
         # Failure: raise a specialized error with captured output
-        raise CommandExecutionError(command, cp.returncode, cp.stdout, cp.stderr)
+        raise CommandExecutionError(command, proc.returncode, stdout, stderr)
     except (OSError, ValueError, TypeError, subprocess.SubprocessError) as e:
         # Generic fallback for known exception types (avoid catching BaseException/Exception)
-        Colors.print(f"Command failed: {command} ({e})", Colors.FAIL)
+        Colors.print(f"Command failed: {_command_text(command)} ({e})", Colors.FAIL)
         # Preserve original behavior for git commands (caller expects an exception)
-        if isinstance(command, str) and "git" in command:
+        if "git" in _command_text(command):
             raise
         # Keep previous behavior: exit on failure for non-git commands
         sys.exit(1)
 
-def run_cmd_output(command: str, cwd: Optional[str] = None, shell: bool = True, env: Optional[Dict[str, str]] = None) -> Optional[str]:
+def run_cmd_output(command: Command, cwd: Optional[Union[str, Path]] = None, shell: bool = True, env: Optional[Dict[str, str]] = None) -> Optional[str]:
     """Run a command and return its stdout or None if the command fails.
 
     This function is a convenience wrapper around subprocess.check_output,
     returning None on failure so callers can detect absence of output.
     """
+    if isinstance(command, str) and shell:
+        simple = _simple_argv(command, cwd, env)
+        if simple is not None:
+            command, shell = simple, False
     try:
         out = subprocess.check_output(command, cwd=cwd, shell=shell, stderr=subprocess.DEVNULL, env=env)
         return out.decode('utf-8').strip()
@@ -106,47 +311,130 @@ def run_cmd_output(command: str, cwd: Optional[str] = None, shell: bool = True,
         return None
 
 
+# [remote "origin"] section and key = value lines of a git config file
+_GIT_SECTION_RE = re.compile(r'^\s*\[\s*([^\]\s"]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_GIT_KEY_RE = re.compile(r'^\s*([A-Za-z][A-Za-z0-9-]*)\s*=\s*(.*?)\s*$')
+
+
+def _git_remote_url(repo_path: Path, remote: str = "origin") -> Optional[str]:
+    """Return remote.<remote>.url for the git checkout at repo_path.
+
+    Reads .git/config directly instead of forking `git config`; falls back
+    to git itself when the config cannot be read as plain key/value pairs
+    (quoted values, include files).
+    """
+    git_dir = repo_path / '.git'
+    try:
+        if git_dir.is_file():
+            # Worktree or submodule: `.git` holds "gitdir: <path>"
+            pointer = git_dir.read_text(encoding='utf-8').strip()
+            if pointer.startswith('gitdir:'):
+                git_dir = (repo_path / pointer[len('gitdir:'):].strip()).resolve()
+                commondir = git_dir / 'commondir'
+                if commondir.is_file():
+                    git_dir = (git_dir / commondir.read_text(encoding='utf-8').strip()).resolve()
+        text = (git_dir / 'config').read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        text = ''
+    in_remote = False
+    needs_git = False
+    for line in text.splitlines():
+        m = _GIT_SECTION_RE.match(line)
+        if m:
+            in_remote = m.group(1).lower() == 'remote' and m.group(2) == remote
+            needs_git = needs_git or m.group(1).lower() in ('include', 'includeif')
+            continue
+        if in_remote:
+            kv = _GIT_KEY_RE.match(line)
+            if kv and kv.group(1).lower() == 'url':
+                value = kv.group(2)
+                if '"' not in value and '\\' not in value:
+                    return value
+                needs_git = True
+    if not needs_git and text:
+        return None
+    return run_cmd_output(['git', 'config', '--get', f'remote.{remote}.url'], cwd=str(repo_path), shell=False)
+
+
 class CommandExecutionError(Exception):
     """Raised when a command executed via run_cmd fails.
 
     Carries stdout/stderr to aid diagnostic analysis.
     """
     def __init__(self, command, returncode, stdout, stderr):
-        super().__init__(f"Command '{command}' failed with return code {returncode}")
+        super().__init__(f"Command '{_command_text(command)}' failed with return code {returncode}")
         self.command = command
         self.returncode = returncode
         self.stdout = stdout
         self.stderr = stderr
 
 
-def detect_lnk_and_pic_issues(stderr: str) -> List[str]:
+@contextlib.contextmanager
+def _mapped_file(path: Union[str, Path]) -> Iterator[Union[mmap.mmap, bytes]]:
+    """Map a file read-only for byte-level substring scans.
+
+    Avoids decoding (and copying) the whole file just to test for a marker;
+    empty files cannot be mapped and yield b'' instead.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+# Every marker detect_lnk_and_pic_issues looks for, as one alternation so the
+# (possibly multi-MB) linker output is scanned once instead of once per marker.
+_DIAG_PATTERN = (
+    # Bounded character classes instead of .*? keep the match linear on
+    # pathological input (no backtracking across the rest of the line)
+    r"(?P<runtime_values>value '(?P<left>[A-Z]{1,8})_[A-Za-z]+' doesn't match value '(?P<right>[A-Z]{1,8})_[A-Za-z]+')"
+    r"|(?P<lnk>LNK2038)|(?P<runtime>RuntimeLibrary)"
+    r"|(?P<pic>recompile with -fPIC)|(?P<reloc>relocation)|(?P<x86>R_X86_64)"
+)
+_DIAG_RE = re.compile(_DIAG_PATTERN)
+_DIAG_RE_BYTES = re.compile(_DIAG_PATTERN.encode())
+
+# Byte patterns detect() runs over mapped build files, compiled once. Anchored
+# to line starts so a commented-out or quoted marker does not count.
+_MAKE_INSTALL_RE = re.compile(rb'^install:', re.MULTILINE)
+_CARGO_BIN_RE = re.compile(rb'^[ \t]*\[\[bin\]\]', re.MULTILINE)
+# [workspace] and [package] in one alternation: one pass tells both apart
+_CARGO_TABLE_RE = re.compile(rb'^[ \t]*\[(workspace|package)\]', re.MULTILINE)
+
+
+def detect_lnk_and_pic_issues(stderr: Union[str, bytes]) -> List[str]:
     """Scan output for LNK2038 (RuntimeLibrary mismatch) or PIC errors and return suggestions.
 
+    Accepts str or raw bytes (bytes are scanned without decoding).
     Returns a list of suggestion strings to apply in order to fix the issue.
     """
-    suggestions = []
+    suggestions: List[str] = []
     if not stderr:
         return suggestions
-    text = stderr
+    pattern: Any = _DIAG_RE_BYTES if isinstance(stderr, bytes) else _DIAG_RE
+    seen: Set[str] = set()
+    runtimes: Optional[Tuple[str, str]] = None
+    for m in pattern.finditer(stderr):
+        seen.add(m.lastgroup)
+        if m.lastgroup == 'runtime_values' and runtimes is None:
+            left, right = m.group('left'), m.group('right')
+            if isinstance(left, bytes):
+                left, right = left.decode('ascii'), right.decode('ascii')
+            runtimes = (left, right)
     # Detect MSVC Runtime mismatch LNK2038
-    if 'LNK2038' in text and 'RuntimeLibrary' in text:
-        # Extract the two settings if possible
+    if 'lnk' in seen and 'runtime' in seen:
         # Example substring: "value 'MD_DynamicRelease' doesn't match value 'MT_StaticRelease'"
-        try:
-            m = re.search(r"value '([A-Z]+)_.*?' doesn't match value '([A-Z]+)_.*?'", text)
-            if m:
-                left = m.group(1)
-                right = m.group(2)
-                suggestions.append(f"Detected MSVC runtime mismatch between {left} and {right}. Consider building with a consistent C runtime.")
-        except (re.error, IndexError, TypeError):
-            suggestions.append("Detected MSVC runtime mismatch (LNK2038). Consider building with consistent /MD or /MT options.")
+        if runtimes:
+            suggestions.append(f"Detected MSVC runtime mismatch between {runtimes[0]} and {runtimes[1]}. Consider building with a consistent C runtime.")
         suggestions.append("Fix options to try:")
         suggestions.append(" - Set environment variable ANVIL_MSVC_RUNTIME=MD (default dynamic CRT) or ANVIL_MSVC_RUNTIME=MT (static CRT)")
         suggestions.append(" - For per-formula control, add 'msvc_runtime': 'MD' or 'MT' to anvil.json in the project")
         suggestions.append(" - For CMake projects, add '-DCMAKE_MSVC_RUNTIME_LIBRARY=MultiThreadedDLL' or 'MultiThreaded' depending on your choice")
 
     # Detect PIC-related errors (relocation errors on Linux/macOS)
-    if 'recompile with -fPIC' in text or 'relocation' in text and 'R_X86_64' in text:
+    if 'pic' in seen or ('reloc' in seen and 'x86' in seen):
         suggestions.append("Detected link-time relocation errors suggesting -fPIC is required for shared libraries.")
         suggestions.append("Fix options to try:")
         suggestions.append(" - Set environment variable ANVIL_FORCE_PIC=1 to add -fPIC to CFLAGS/CXXFLAGS when building.")
@@ -155,21 +443,16 @@ def detect_lnk_and_pic_issues(stderr: str) -> List[str]:
     return suggestions
 
 
-def default_build_env(msvc_runtime_override: Optional[str] = None, force_pic_override: Optional[bool] = None) -> Dict[str, str]:
-    """Return a default environment dictionary for build commands.
+@functools.lru_cache(maxsize=8)
+def _compute_env_delta(msvc_runtime: str, force_pic: bool, cl: str, cflags: str, cxxflags: str) -> Tuple[Tuple[str, str], ...]:
+    """Return the (key, value) overrides default_build_env applies on top of os.environ.
 
-    On Windows with MSVC we force the compiler runtime to use the dynamic CRT
-    (i.e. /MD / MultiThreadedDLL) to avoid linker mismatches across multi-stage
-    builds that include both rust/cargo cmake and C/C++ build steps.
+    Keyed on every input it reads, so the cached result is always current.
     """
-    env: Dict[str, str] = os.environ.copy()
-    if os.name == 'nt':
+    delta: Dict[str, str] = {}
+    if _IS_WIN:
         # Ensure we request the dynamic CRT. Prefer /MD over /MT.
-        # Allow overriding via ANVIL_MSVC_RUNTIME: 'MD' (dll) or 'MT' (static)
-        requested = os.environ.get('ANVIL_MSVC_RUNTIME', '').strip().upper()
-        if msvc_runtime_override:
-            requested = str(msvc_runtime_override).strip().upper()
-        if requested == 'MT':
+        if msvc_runtime == 'MT':
             cl_flag = '/MT'
             cmake_flag = 'MultiThreaded'
         else:
@@ -177,41 +460,63 @@ def default_build_env(msvc_runtime_override: Optional[str] = None, force_pic_ove
             cl_flag = '/MD'
             cmake_flag = 'MultiThreadedDLL'
 
-        cl = env.get('CL', '')
         # If CL contains either prefix, replace it with our chosen flag; otherwise prepend
         if '/MT' in cl or '/MD' in cl:
-            env['CL'] = cl.replace('/MT', cl_flag).replace('/MD', cl_flag)
+            delta['CL'] = cl.replace('/MT', cl_flag).replace('/MD', cl_flag)
         else:
-            env['CL'] = f"{cl_flag} {cl}".strip()
+            delta['CL'] = f"{cl_flag} {cl}".strip()
 
         # Make CMake default to the matching MSVC runtime
-        env['CMAKE_MSVC_RUNTIME_LIBRARY'] = cmake_flag
+        delta['CMAKE_MSVC_RUNTIME_LIBRARY'] = cmake_flag
+    elif force_pic:
+        if '-fPIC' not in cflags:
+            delta['CFLAGS'] = (cflags + ' -fPIC').strip()
+        if '-fPIC' not in cxxflags:
+            delta['CXXFLAGS'] = (cxxflags + ' -fPIC').strip()
+    return tuple(delta.items())
+
+
+def default_build_env(msvc_runtime_override: Optional[str] = None, force_pic_override: Optional[bool] = None) -> Dict[str, str]:
+    """Return a default environment dictionary for build commands.
+
+    On Windows with MSVC we force the compiler runtime to use the dynamic CRT
+    (i.e. /MD / MultiThreadedDLL) to avoid linker mismatches across multi-stage
+    builds that include both rust/cargo cmake and C/C++ build steps.
+    """
+    environ = os.environ
+    if _IS_WIN:
+        # Allow overriding via ANVIL_MSVC_RUNTIME: 'MD' (dll) or 'MT' (static)
+        requested = environ.get('ANVIL_MSVC_RUNTIME', '').strip().upper()
+        if msvc_runtime_override:
+            requested = str(msvc_runtime_override).strip().upper()
+        delta = _compute_env_delta(requested, False, environ.get('CL', ''), '', '')
+        return {**environ, **dict(delta)}
+
     # Handle POSIX-specific optional flags (Linux, macOS): allow user to
     # force -fPIC for libraries with ANVIL_FORCE_PIC=1 to avoid reloc issues
     # when creating shared libraries copied into install prefixes.
     # When not requested, do not modify the user's CFLAGS/CXXFLAGS.
-    if os.name != 'nt':
-        # Respect explicit override; otherwise look at env var
-        force_pic = False
-        if force_pic_override is not None:
-            force_pic = bool(force_pic_override)
-        else:
-            force_pic = os.environ.get('ANVIL_FORCE_PIC', '').strip() in ('1', 'true', 'True', 'TRUE')
-        if force_pic:
-            cflags = env.get('CFLAGS', '')
-            if '-fPIC' not in cflags:
-                env['CFLAGS'] = (cflags + ' -fPIC').strip()
-            cxxflags = env.get('CXXFLAGS', '')
-            if '-fPIC' not in cxxflags:
-                env['CXXFLAGS'] = (cxxflags + ' -fPIC').strip()
-
-    return env
+    if force_pic_override is not None:
+        force_pic = bool(force_pic_override)
+    else:
+        force_pic = environ.get('ANVIL_FORCE_PIC', '').strip() in ('1', 'true', 'True', 'TRUE')
+    if not force_pic:
+        return environ.copy()
+    delta = _compute_env_delta('', True, '', environ.get('CFLAGS', ''), environ.get('CXXFLAGS', ''))
+    return {**environ, **dict(delta)}
 
 
 # --- GitHub release check helpers ---
-def _platform_asset_tokens() -> Set[str]:
+# Read size for streaming release downloads (urlretrieve uses 8 KiB)
+_DOWNLOAD_CHUNK = 1 << 20
+# Matches https://github.com/owner/repo(.git) and git@github.com:owner/repo(.git)
+_GITHUB_RE = re.compile(r'github\.com[:/]+([^/]+)/([^/.]+)')
+
+
+@functools.lru_cache(maxsize=1)
+def _platform_asset_tokens() -> FrozenSet[str]:
     """Return tokens to match against release asset filenames for this platform."""
-    system = platform.system().lower()
+    system = _PLATFORM.lower()
     machine = platform.machine().lower()
     tokens: Set[str] = {system, machine, "x86_64", "x64", "amd64"}
     if system == 'windows':
@@ -220,16 +525,22 @@ def _platform_asset_tokens() -> Set[str]:
         tokens.update({'mac', 'darwin', 'dylib', 'tar.gz', 'zip'})
     else:
         tokens.update({'linux', 'tar.gz', 'tar.xz', 'tgz'})
-    return tokens
+    return frozenset(tokens)
+
+
+@functools.lru_cache(maxsize=1)
+def _platform_asset_re() -> Pattern[str]:
+    """Return a compiled alternation of the platform tokens (one scan per asset name)."""
+    # Longest tokens first so the alternation prefers the most specific match
+    tokens = sorted(_platform_asset_tokens(), key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, tokens)))
 
 
 def _asset_name_matches_platform(asset_name: str) -> bool:
     """Return True if the asset name looks like a prebuilt for this platform."""
     if not asset_name:
         return False
-    name = asset_name.lower()
-    tokens = _platform_asset_tokens()
-    return any(tok in name for tok in tokens)
+    return _platform_asset_re().search(asset_name.lower()) is not None
 
 
 def _normalize_github_owner_repo(target: str) -> Optional[str]:
@@ -240,12 +551,346 @@ def _normalize_github_owner_repo(target: str) -> Optional[str]:
     if '/' in target and target.count('/') == 1 and not target.startswith('http'):
         return target
     # https://github.com/owner/repo(.git)?
-    m = re.search(r'github\\.com[:/]+([^/]+)/([^/\\.]+)', target)
+    m = _GITHUB_RE.search(target)
     if m:
         return f"{m.group(1)}/{m.group(2)}"
     return None
 
 
+# Keep-alive HTTPS connections per (thread, host). http.client connections are
+# not thread-safe, so concurrent release checks each get their own.
+_http_local = threading.local()
+_HTTP_REDIRECTS = (301, 302, 303, 307, 308)
+
+
+# A request on a kept-alive socket fails with one of these when the server
+# closed it while idle; only then is a retry on a fresh connection worthwhile
+_STALE_CONN_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+def _new_https_connection(host: str, timeout: float) -> http.client.HTTPSConnection:
+    """Open an HTTPSConnection to host, tunnelled through HTTPS_PROXY unless NO_PROXY exempts it.
+
+    Matches what urllib.request.urlopen does with the same environment.
+    """
+    proxy = urllib.request.getproxies().get('https')
+    hostname = urllib.parse.urlsplit('//' + host).hostname or host
+    if not proxy or urllib.request.proxy_bypass(hostname):
+        return http.client.HTTPSConnection(host, timeout=timeout)
+    if '://' not in proxy:
+        proxy = 'http://' + proxy
+    p = urllib.parse.urlsplit(proxy)
+    # "host:port" in one string (http.client splits it, brackets for IPv6 included)
+    proxy_hostport = p.netloc.rpartition('@')[2]
+    if p.port is None:
+        proxy_hostport += ':80'
+    conn = http.client.HTTPSConnection(proxy_hostport, timeout=timeout)
+    tunnel_headers: Dict[str, str] = {}
+    if p.username is not None:
+        creds = f"{urllib.parse.unquote(p.username)}:{urllib.parse.unquote(p.password or '')}"
+        tunnel_headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(creds.encode()).decode('ascii')
+    conn.set_tunnel(host, headers=tunnel_headers)
+    return conn
+
+
+def _https_connection(host: str, timeout: float) -> http.client.HTTPSConnection:
+    conns: Dict[str, http.client.HTTPSConnection] = getattr(_http_local, 'conns', None) or {}
+    _http_local.conns = conns
+    conn = conns.get(host)
+    if conn is None:
+        conn = _new_https_connection(host, timeout)
+        conns[host] = conn
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn
+
+
+@contextlib.contextmanager
+def _http_get(url: str, headers: Dict[str, str], timeout: float = 5, max_redirects: int = 5) -> Iterator[http.client.HTTPResponse]:
+    """GET `url` over a reused keep-alive HTTPS connection, following redirects.
+
+    Saves a TCP+TLS handshake per request after the first one to each host
+    (api.github.com, the release CDN). The response is yielded whatever its
+    status; a body that was not fully read closes the connection on exit.
+    HTTPS_PROXY/NO_PROXY are honoured as urlopen would (CONNECT tunnel).
+    """
+    headers = dict(headers)
+    for _ in range(max_redirects + 1):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != 'https' or not parts.netloc:
+            raise urllib.error.URLError(f"unsupported URL: {url}")
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        conn = _https_connection(parts.netloc, timeout)
+        reused = conn.sock is not None
+        try:
+            try:
+                conn.request('GET', target, headers=headers)
+                resp = conn.getresponse()
+            except _STALE_CONN_ERRORS:
+                # The server closed the kept-alive socket while idle; retry once fresh.
+                # Timeouts and refused connections are not retried.
+                conn.close()
+                if not reused:
+                    raise
+                conn.request('GET', target, headers=headers)
+                resp = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # Leave no half-used connection behind for the next request
+            conn.close()
+            raise
+        location = resp.getheader('Location')
+        if resp.status in _HTTP_REDIRECTS and location:
+            resp.read()
+            next_url = urllib.parse.urljoin(url, location)
+            if urllib.parse.urlsplit(next_url).netloc != parts.netloc:
+                # Never forward credentials to another host (e.g. the asset CDN)
+                headers.pop('Authorization', None)
+            url = next_url
+            continue
+        try:
+            yield resp
+        finally:
+            if not resp.isclosed() and resp.length == 0:
+                # No body to read (304 revalidations, 204): reading marks the
+                # response done, so the connection stays open for reuse
+                resp.read()
+            if not resp.isclosed():
+                conn.close()
+        return
+    raise urllib.error.URLError(f"too many redirects: {url}")
+
+
+_release_cache_conn: Optional[sqlite3.Connection] = None
+_release_cache_lock = threading.Lock()
+
+
+def _release_cache() -> Optional[sqlite3.Connection]:
+    """Return the shared connection to the on-disk release cache (opened lazily).
+
+    Returns None if the cache cannot be opened; callers then skip caching.
+    """
+    global _release_cache_conn
+    if _release_cache_conn is None:
+        try:
+            ANVIL_ROOT.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(RELEASE_CACHE_DB), isolation_level=None, check_same_thread=False)
+            conn.executescript(
+                "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"
+                "CREATE TABLE IF NOT EXISTS release_cache"
+                "(repo TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, fetched_at INTEGER);"
+            )
+            _release_cache_conn = conn
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Release cache unavailable (%s): %s", RELEASE_CACHE_DB, e)
+            return None
+    return _release_cache_conn
+
+
+_packages_conn: Optional[sqlite3.Connection] = None
+_packages_lock = threading.Lock()
+
+
+def _packages_db() -> Optional[sqlite3.Connection]:
+    """Return the shared connection to the installed-package manifest (opened lazily).
+
+    WAL mode lets concurrent anvil invocations read while one writes.
+    Returns None if the manifest cannot be opened; callers fall back to
+    inspecting INSTALL_DIR.
+    """
+    global _packages_conn
+    if _packages_conn is None:
+        try:
+            ANVIL_ROOT.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(PACKAGES_DB), isolation_level=None, check_same_thread=False)
+            conn.executescript(
+                "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"
+                "CREATE TABLE IF NOT EXISTS packages"
+                "(name TEXT PRIMARY KEY, version TEXT, install_path TEXT, installed_at INTEGER, etag TEXT);"
+                "CREATE INDEX IF NOT EXISTS idx_packages_name ON packages(name);"
+            )
+            _packages_conn = conn
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Package manifest unavailable (%s): %s", PACKAGES_DB, e)
+            return None
+    return _packages_conn
+
+
+def _installed_path(name: str) -> Optional[str]:
+    """Return the recorded install path for `name`, or None if not recorded."""
+    conn = _packages_db()
+    if conn is None:
+        return None
+    try:
+        with _packages_lock:
+            row = conn.execute("SELECT install_path FROM packages WHERE name=?", (name,)).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("Package manifest read failed for %s: %s", name, e)
+        return None
+    return row[0] if row else None
+
+
+def _record_install(name: str, install_path: Path, version: Optional[str] = None, etag: Optional[str] = None) -> None:
+    conn = _packages_db()
+    if conn is None:
+        return
+    try:
+        with _packages_lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO packages (name, version, install_path, installed_at, etag) VALUES (?, ?, ?, ?, ?)",
+                (name, version, str(install_path), int(time.time()), etag),
+            )
+    except sqlite3.Error as e:
+        logger.warning("Package manifest write failed for %s: %s", name, e)
+
+
+def _forget_install(name: str) -> None:
+    conn = _packages_db()
+    if conn is None:
+        return
+    try:
+        with _packages_lock:
+            conn.execute("DELETE FROM packages WHERE name=?", (name,))
+    except sqlite3.Error as e:
+        logger.warning("Package manifest delete failed for %s: %s", name, e)
+
+
+def _release_cache_get(owner_repo: str) -> Optional[Tuple[Optional[str], Optional[str], bytes]]:
+    """Return (etag, last_modified, body) cached for owner_repo, if any."""
+    conn = _release_cache()
+    if conn is None:
+        return None
+    try:
+        with _release_cache_lock:
+            row = conn.execute("SELECT etag, last_modified, body FROM release_cache WHERE repo=?", (owner_repo,)).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("Release cache read failed for %s: %s", owner_repo, e)
+        return None
+    return (row[0], row[1], bytes(row[2])) if row else None
+
+
+def _release_cache_put(owner_repo: str, etag: Optional[str], last_modified: Optional[str], body: bytes) -> None:
+    conn = _release_cache()
+    if conn is None:
+        return
+    try:
+        with _release_cache_lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO release_cache (repo, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (owner_repo, etag, last_modified, body, int(time.time())),
+            )
+    except sqlite3.Error as e:
+        logger.warning("Release cache write failed for %s: %s", owner_repo, e)
+
+
+@functools.lru_cache(maxsize=64)
+def _fetch_latest_release(owner_repo: str) -> Optional[Dict[str, Any]]:
+    """Return the parsed `releases/latest` JSON for owner/repo, or None on error.
+
+    Responses are persisted in RELEASE_CACHE_DB and revalidated with
+    If-None-Match/If-Modified-Since, so an unchanged release costs a 304
+    (which GitHub does not count against the rate limit). Memoized so
+    repeated probes for the same repository within one run only hit the API once.
+    """
+    api_url = f"https://api.github.com/repos/{owner_repo}/releases/latest"
+    cached = _release_cache_get(owner_repo)
+    try:
+        headers = {'User-Agent': 'anvil-release-check/1.0', 'Accept': 'application/vnd.github+json'}
+        token = os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN')
+        if token:
+            headers['Authorization'] = f"token {token}"
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        with _http_get(api_url, headers, timeout=5) as resp:
+            if resp.status == 304 and cached:
+                logger.debug("Release cache hit (304) for %s", owner_repo)
+                body = cached[2]
+            elif resp.status != 200:
+                logger.warning("GitHub API returned status %s for %s", resp.status, api_url)
+                return None
+            else:
+                body = resp.read()
+                _release_cache_put(owner_repo, resp.getheader('ETag'), resp.getheader('Last-Modified'), body)
+        data: Dict[str, Any] = json.loads(body)
+    except (urllib.error.URLError, http.client.HTTPException, json.JSONDecodeError, OSError) as e:
+        logger.warning("Release check network/parsing error for %s: %s", api_url, e)
+        return None
+    return data
+
+
+def _dir_nonempty(path: Path) -> bool:
+    """Return True if `path` is a directory with at least one entry.
+
+    Stops after the first scandir entry instead of listing the whole tree.
+    """
+    try:
+        with os.scandir(path) as it:
+            return next(it, None) is not None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+# Archive suffixes Python can extract itself, straight from the HTTP response
+# Unseekable zip bodies up to this size are spooled in memory, larger ones to disk
+_ZIP_SPOOL_MAX = 16 << 20
+_TAR_SUFFIXES = ('.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.bz2', '.tbz2', '.tar')
+# Source archives AutoBuilder.detect unpacks, in priority order
+_SOURCE_ARCHIVE_SUFFIXES = (".tar.xz", ".7z", ".tar.bz2", ".tar.gz", ".tgz", ".tar", ".zip")
+
+
+def _extract_stream(stream: Any, asset_name: str, dest: Path) -> bool:
+    """Extract a tar/zip asset from `stream` into `dest` without a temp file.
+
+    Tarballs are read in streaming mode ('r|*'), so download and extraction
+    happen in one pass. Zip needs random access; an unseekable body is spooled
+    to a temporary file that stays in memory only while it is small. Returns
+    False for formats that need the on-disk fallback.
+    """
+    lower = asset_name.lower()
+    if lower.endswith(_TAR_SUFFIXES):
+        with tarfile.open(fileobj=stream, mode='r|*') as tf:
+            if hasattr(tarfile, 'data_filter'):
+                tf.extractall(dest, filter='data')
+            else:
+                tf.extractall(dest)
+        return True
+    if lower.endswith('.zip'):
+        if stream.seekable():
+            with zipfile.ZipFile(stream) as zf:
+                _extract_zip(zf, dest)
+            return True
+        with tempfile.SpooledTemporaryFile(max_size=_ZIP_SPOOL_MAX) as spool:
+            shutil.copyfileobj(stream, spool, length=_DOWNLOAD_CHUNK)
+            spool.seek(0)
+            with zipfile.ZipFile(spool) as zf:
+                _extract_zip(zf, dest)
+        return True
+    return False
+
+
+def _extract_zip(zf: zipfile.ZipFile, dest: Path) -> None:
+    """zf.extractall(dest), keeping the Unix permission bits stored per member
+    (ZipFile drops them; unzip does not), so packaged executables stay runnable."""
+    for info in zf.infolist():
+        path = zf.extract(info, dest)
+        mode = info.external_attr >> 16
+        if mode and not info.is_dir() and not _IS_WIN:
+            os.chmod(path, stat.S_IMODE(mode))
+
+
+def _extract_source_archive(name: str, build_path: Path, install_path: Path) -> None:
+    """Build step for a repo that is just an archive: unpack build_path/name into install_path."""
+    with open(build_path / name, 'rb') as f:
+        if not _extract_stream(f, name, install_path):
+            raise ValueError(f"unsupported archive format: {name}")
+
+
 def check_for_release(target: str) -> bool:
     """Check GitHub releases for a platform-matching prebuilt for `target`.
 
@@ -268,8 +913,18 @@ def check_for_release(target: str) -> bool:
         name = os.path.basename(str(target)).replace('.git', '')
 
     install_path = INSTALL_DIR / name
-    # If already installed locally, skip build
-    if install_path.exists() and any(install_path.iterdir()):
+    # If already installed locally, skip build. The manifest names the
+    # install dir, which must still hold files (a row whose dir was deleted
+    # by hand is dropped); installs that predate the manifest are found by
+    # the directory probe and backfilled.
+    recorded = _installed_path(name)
+    if recorded is not None:
+        if _dir_nonempty(Path(recorded)):
+            Colors.print(f"Found existing installation for {name}; skipping release check.", Colors.OKGREEN)
+            return True
+        _forget_install(name)
+    if _dir_nonempty(install_path):
+        _record_install(name, install_path)
         Colors.print(f"Found existing installation for {name}; skipping release check.", Colors.OKGREEN)
         return True
 
@@ -277,21 +932,8 @@ def check_for_release(target: str) -> bool:
     if not owner_repo:
         return False
 
-    api_url = f"https://api.github.com/repos/{owner_repo}/releases/latest"
-    try:
-        headers = {'User-Agent': 'anvil-release-check/1.0'}
-        token = os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN')
-        if token:
-            headers['Authorization'] = f"token {token}"
-        req = urllib.request.Request(api_url, headers=headers)
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            status = getattr(resp, 'status', None) or resp.getcode()
-            if status != 200:
-                logger.warning("GitHub API returned status %s for %s", status, api_url)
-                return False
-            data = json.load(resp)
-    except (urllib.error.HTTPError, urllib.error.URLError, json.JSONDecodeError, OSError) as e:
-        logger.warning("Release check network/parsing error for %s: %s", api_url, e)
+    data = _fetch_latest_release(owner_repo)
+    if data is None:
         return False
 
     assets = data.get('assets', []) or []
@@ -301,62 +943,189 @@ def check_for_release(target: str) -> bool:
             download_url = asset.get('browser_download_url')
             if not download_url:
                 continue
-            # Attempt to download and extract/install into install_path
+            # Download and extract into a sibling staging dir and move it into
+            # place only on success: a partial tree left in install_path would
+            # pass the "already installed" probe on the next run
+            staging: Optional[Path] = None
+            tmp_file: Optional[Path] = None
             try:
-                tmp_dir = Path(os.getenv('TMP', '/tmp'))
-                tmp_file = tmp_dir / asset_name
                 Colors.print(f"Downloading prebuilt release asset: {asset_name}", Colors.OKBLUE)
-                urllib.request.urlretrieve(download_url, str(tmp_file))
-                install_path.mkdir(parents=True, exist_ok=True)
-                # Try to unpack common archive formats; fall back to saving a single binary in bin/
-                try:
-                    shutil.unpack_archive(str(tmp_file), str(install_path))
-                except (shutil.ReadError, ValueError):
-                    # Not an archive — copy to bin
-                    bin_dir = install_path / 'bin'
-                    bin_dir.mkdir(parents=True, exist_ok=True)
-                    dest = bin_dir / asset_name
-                    shutil.copy2(str(tmp_file), str(dest))
-                    if os.name != 'nt':
-                        dest.chmod(dest.stat().st_mode | stat.S_IXUSR)
-                finally:
-                    # Best-effort cleanup of temporary file
+                with _http_get(download_url, {'User-Agent': 'anvil-release-check/1.0'}, timeout=30) as r:
+                    if r.status != 200:
+                        raise urllib.error.HTTPError(download_url, r.status, r.reason, r.headers, None)
+                    INSTALL_DIR.mkdir(parents=True, exist_ok=True)
+                    staging = Path(tempfile.mkdtemp(prefix=f".{name}.", dir=INSTALL_DIR))
+                    # mkdtemp creates 0o700; give the install dir mkdir's usual mode
+                    os.chmod(staging, 0o777 & ~_UMASK)
+                    extracted = _extract_stream(r, asset_name, staging)
+                    if not extracted:
+                        # A temp file of its own per download (the suffix keeps the
+                        # extension unpack_archive detects the format from)
+                        fd, tmp_name = tempfile.mkstemp(suffix=f"-{asset_name}", dir=os.getenv('TMP') or None)
+                        tmp_file = Path(tmp_name)
+                        with os.fdopen(fd, 'wb') as f:
+                            shutil.copyfileobj(r, f, length=_DOWNLOAD_CHUNK)
+                if tmp_file is not None:
+                    # Try the remaining archive formats; fall back to saving a single binary in bin/
                     try:
-                        if tmp_file.exists():
-                            tmp_file.unlink()
-                    except OSError as e:
-                        logger.warning("Failed to remove temp file %s: %s", tmp_file, e)
+                        shutil.unpack_archive(str(tmp_file), str(staging))
+                    except (shutil.ReadError, ValueError):
+                        # Not an archive — copy to bin
+                        bin_dir = staging / 'bin'
+                        bin_dir.mkdir(parents=True, exist_ok=True)
+                        dest = bin_dir / asset_name
+                        shutil.copy2(str(tmp_file), str(dest))
+                        if not _IS_WIN:
+                            dest.chmod(dest.stat().st_mode | stat.S_IXUSR)
+                if os.path.lexists(install_path):
+                    # Only an empty directory can be here (checked above)
+                    safe_rmtree(install_path)
+                os.replace(staging, install_path)
+                staging = None
+                _record_install(name, install_path, version=data.get('tag_name'))
                 Colors.print(f"Installed prebuilt release for {name}", Colors.OKGREEN)
                 return True
-            except (urllib.error.HTTPError, urllib.error.URLError, OSError, shutil.ReadError, ValueError) as e:
+            except (urllib.error.URLError, http.client.HTTPException, OSError, shutil.ReadError, tarfile.TarError, zipfile.BadZipFile, ValueError) as e:
                 logger.warning("Failed to download/install release asset %s: %s", asset_name, e)
                 # treat as no suitable release available
                 return False
+            finally:
+                if staging is not None:
+                    safe_rmtree(staging)
+                if tmp_file is not None:
+                    # Best-effort cleanup of temporary file
+                    try:
+                        tmp_file.unlink()
+                    except OSError as e:
+                        logger.warning("Failed to remove temp file %s: %s", tmp_file, e)
 
     return False
 
 
-def _on_rm_error(func: Callable[[str], None], path: str, exc_info: Any) -> None:
-    """Error handler for shutil.rmtree to handle read-only files on Windows.
-    Tries to make file writable and retries the operation.
+# Backoff for transient removal failures (AV scanners, indexers and editors
+# briefly holding handles on Windows): start at 1 ms, double, cap at 1 s.
+_RM_RETRIES = 8
+_RM_INITIAL_DELAY = 0.001
+_RM_MAX_DELAY = 1.0
+# Inline retries for a single path inside the rmtree error handler
+_RM_INLINE_RETRIES = 4
+
+
+def _backoff_delay(attempt: int, initial_delay: float = _RM_INITIAL_DELAY, max_delay: float = _RM_MAX_DELAY) -> float:
+    """Exponential backoff with jitter for retry `attempt` (0-based)."""
+    return min(max_delay, initial_delay * (2 ** attempt)) + random.uniform(0, initial_delay)
+
+
+def _on_rm_exc(func: Callable[[str], None], path: str, exc: BaseException) -> None:
+    """shutil.rmtree error handler that handles read-only files on Windows.
+    Makes the path writable if needed and retries just that path with
+    backoff, so a transient lock does not restart the whole tree walk.
     """
-    # Only handle permission errors
     if not os.access(path, os.W_OK):
         try:
             os.chmod(path, stat.S_IWRITE)
-            func(path)
         except OSError as e:
-            Colors.print(f"Failed to remove {path}: {exc_info} ({e})", Colors.FAIL)
+            Colors.print(f"Failed to remove {path}: {exc} ({e})", Colors.FAIL)
+            return
+    elif not isinstance(exc, PermissionError):
+        # Not a permission/lock problem - re-raise the original exception object
+        raise exc
+    for attempt in range(_RM_INLINE_RETRIES):
+        try:
+            func(path)
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            time.sleep(_backoff_delay(attempt))
+    # Let the caller's retry loop pick up whatever is left
+    func(path)
+
+
+def _on_rm_error(func: Callable[[str], None], path: str, exc_info: Any) -> None:
+    """`onerror` form of _on_rm_exc for Python < 3.12."""
+    _on_rm_exc(func, path, exc_info[1])
+
+
+def _rmtree(path: str) -> None:
+    # 3.12 deprecates onerror; onexc gets the exception without a sys.exc_info() tuple
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=_on_rm_exc)
+    else:
+        shutil.rmtree(path, onerror=_on_rm_error)
+
+
+def _unlink_writable(path: str) -> None:
+    """Unlink a file, clearing the Windows read-only attribute if needed."""
+    try:
+        os.unlink(path)
+    except PermissionError:
+        os.chmod(path, stat.S_IWRITE)
+        os.unlink(path)
+
+
+def _remove_entry(entry: "os.DirEntry[str]") -> None:
+    if entry.is_dir(follow_symlinks=False):
+        _rmtree(entry.path)
     else:
-        # Raise if it's a different error - re-raise the original exception object
-        raise exc_info[1]
+        _unlink_writable(entry.path)
+
+
+# Shim ownership checks in uninstall: thread count, and the size below which
+# they run inline
+_SHIM_CHECK_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_PARALLEL_SHIM_MIN = 8
+# Target path inside a Windows shim written by _link_binaries: @echo off\n"<src>" %*
+_BAT_SHIM_RE = re.compile(r'^"([^"]+)" %\*', re.MULTILINE)
+
 
+def _shim_target(path: str, is_link: bool) -> Optional[str]:
+    """Return the file a BIN_DIR shim runs (symlink target or .bat target), or None.
 
-def safe_rmtree(path: Path, retries: int = 3, delay: float = 0.5) -> None:
+    None means `path` is not a shim in the form _link_binaries writes; OSError
+    from reading the link or file propagates. One readlink is enough (no
+    realpath walk): Anvil links point straight at the installed file.
+    """
+    if is_link:
+        target = os.readlink(path)
+        return os.path.normpath(os.path.join(os.path.dirname(path), target))
+    if _IS_WIN and path.lower().endswith('.bat'):
+        # Shims name their target on the line after "@echo off"; the head is enough
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            m = _BAT_SHIM_RE.search(f.read(4096))
+        return os.path.normpath(m.group(1)) if m else None
+    return None
+
+# Upper bound on threads used to delete a tree's top-level entries concurrently
+_RMTREE_WORKERS = 8
+
+
+def _rmtree_parallel(path: Path) -> None:
+    """Remove a directory tree, deleting its top-level entries on a thread pool.
+
+    Removal is unlink()/rmdir() syscall-bound and each subtree is
+    independent, so large build trees clear several times faster on SSDs.
+    """
+    with os.scandir(path) as it:
+        children = list(it)
+    if len(children) > 1:
+        with ThreadPoolExecutor(max_workers=min(_RMTREE_WORKERS, len(children))) as ex:
+            # list() propagates the first worker exception to the caller's retry loop
+            list(ex.map(_remove_entry, children))
+    else:
+        for child in children:
+            _remove_entry(child)
+    os.rmdir(path)
+
+
+def safe_rmtree(path: Path, retries: int = _RM_RETRIES, initial_delay: float = _RM_INITIAL_DELAY, max_delay: float = _RM_MAX_DELAY) -> None:
     """Remove files or directory trees safely, dealing with Windows read-only attributes.
 
     - If `path` is a file or symlink, unlink it (with retries).
-    - If `path` is a directory, call shutil.rmtree with an onerror handler.
+    - If `path` is a directory, remove its top-level entries in parallel
+      (shutil.rmtree with a retrying error handler per subtree), then the directory.
+    - Failed attempts are retried with exponential backoff plus jitter,
+      starting at `initial_delay` and capped at `max_delay`.
 
     SAFETY: refuse to remove the Anvil root, the user's HOME, or the filesystem root.
     This prevents accidental mass-deletion when housekeeping is run with bad paths.
@@ -391,7 +1160,7 @@ def safe_rmtree(path: Path, retries: int = 3, delay: float = 0.5) -> None:
             except OSError as e:
                 last_err = e
                 Colors.print(f"Retrying removal of {path}: {e}", Colors.WARNING)
-                time.sleep(delay)
+                time.sleep(_backoff_delay(attempt, initial_delay, max_delay))
                 attempt += 1
         Colors.print(f"Could not remove path {path} after {retries} attempts: {last_err}", Colors.FAIL)
         return
@@ -401,15 +1170,234 @@ def safe_rmtree(path: Path, retries: int = 3, delay: float = 0.5) -> None:
     last_err: Optional[OSError] = None
     while attempt < retries:
         try:
-            shutil.rmtree(path, onerror=_on_rm_error)
+            _rmtree_parallel(path)
             return
         except OSError as e:
             last_err = e
             Colors.print(f"Retrying removal of {path}: {e}", Colors.WARNING)
-            time.sleep(delay)
+            time.sleep(_backoff_delay(attempt, initial_delay, max_delay))
             attempt += 1
     Colors.print(f"Could not remove path {path} after {retries} attempts: {last_err}", Colors.FAIL)
 
+def _scandir_recursive(path: Union[str, Path], prune: Optional[Callable[["os.DirEntry[str]"], bool]] = None) -> Iterator["os.DirEntry[str]"]:
+    """Yield a DirEntry for every non-directory below `path`.
+
+    Unlike Path.rglob, the entries carry the type information returned by
+    the directory read, so name/type checks need no extra stat() calls.
+    Symlinked directories are not descended into; unreadable ones are skipped,
+    as are directories for which `prune(entry)` is true.
+    """
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if prune is None or not prune(entry):
+                        yield from _scandir_recursive(entry.path, prune)
+                else:
+                    yield entry
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return
+
+# Per-profile Cargo output dirs (target/<profile>/...) holding intermediates:
+# hashed copies of every binary, build-script executables, incremental state.
+_CARGO_INTERMEDIATE_DIRS = frozenset({'deps', 'incremental', '.fingerprint', 'build', 'examples'})
+
+
+def _is_cargo_intermediate(entry: "os.DirEntry[str]") -> bool:
+    """True for target/<profile>/{deps,build,...}, which hold no final artifacts."""
+    if entry.name not in _CARGO_INTERMEDIATE_DIRS:
+        return False
+    profile_dir = os.path.dirname(entry.path)
+    return os.path.basename(os.path.dirname(profile_dir)) == 'target' and os.path.basename(profile_dir) in ('release', 'debug')
+
+
+# errnos meaning "copy_file_range can't do this pair of files", not a real failure
+_COPY_RANGE_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ETXTBSY}
+
+
+def _copy_file_range(src: str, dst: str, copy_mode: bool = False) -> bool:
+    """Copy file data in-kernel with copy_file_range (reflinks on btrfs/XFS).
+
+    Returns False, before any data is written, if the kernel or filesystem
+    cannot do it. With copy_mode, the permission bits are applied through
+    the open descriptor from the fstat already taken (no extra stat/chmod).
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        st = os.fstat(fsrc.fileno())
+        size = st.st_size
+        copied = 0
+        try:
+            while copied < size:
+                n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if copied == 0 and e.errno in _COPY_RANGE_UNSUPPORTED:
+                return False
+            raise
+        if copy_mode:
+            os.fchmod(fdst.fileno(), stat.S_IMODE(st.st_mode))
+    return True
+
+
+def _fast_copy(src: Union[str, Path], dst: Union[str, Path], preserve_metadata: bool = False) -> str:
+    """shutil.copy / shutil.copy2 replacement using the platform's fastest file copy.
+
+    Linux tries copy_file_range first (a near-instant reflink on CoW
+    filesystems). Windows uses CopyFileExW. Otherwise and on fallback it
+    uses shutil.copyfile, which already uses sendfile/fcopyfile where it can.
+    As with shutil.copy, `dst` may be a directory. Returns the destination path.
+    """
+    src, dst = os.fspath(src), os.fspath(dst)
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    done = mode_done = False
+    if _IS_WIN:
+        import ctypes
+        done = bool(ctypes.windll.kernel32.CopyFileExW(src, dst, None, None, None, 0))  # type: ignore[attr-defined]
+    elif hasattr(os, 'copy_file_range'):
+        done = mode_done = _copy_file_range(src, dst, copy_mode=not preserve_metadata)
+    if not done:
+        shutil.copyfile(src, dst)
+    if preserve_metadata:
+        shutil.copystat(src, dst)
+    elif not mode_done:
+        shutil.copymode(src, dst)
+    return dst
+
+
+def _fast_copy2(src: Union[str, Path], dst: Union[str, Path]) -> str:
+    """_fast_copy preserving metadata, like shutil.copy2 (also a copytree copy_function)."""
+    return _fast_copy(src, dst, preserve_metadata=True)
+
+
+# Artifact copies are I/O-bound (the copy syscalls release the GIL), so larger
+# batches overlap on a thread pool; below the threshold startup costs more.
+_COPY_WORKERS = 8
+_PARALLEL_COPY_MIN = 8
+# Executable-bit files with these suffixes are sources/libraries, not build outputs
+_SKIP_SUFFIXES = frozenset({'.py', '.sh', '.txt', '.md', '.c', '.h', '.o', '.a', '.so', '.dll', '.dylib'})
+
+
+@functools.lru_cache(maxsize=None)
+def _copy_pool() -> ThreadPoolExecutor:
+    """Process-wide pool for artifact copies, started on first use.
+
+    A forge runs several copy steps; reusing one pool avoids spinning up
+    (and joining) a new set of threads for each.
+    """
+    return ThreadPoolExecutor(max_workers=_COPY_WORKERS, thread_name_prefix="anvil-copy")
+
+
+def _copy_files(pairs: List[Tuple[str, str]], copy: Callable[[str, str], Any] = _fast_copy, ignore_errors: bool = False) -> int:
+    """Copy each (src, dst) pair and return how many copies succeeded.
+
+    With ignore_errors, a failed copy is logged and skipped; otherwise the
+    first failure is raised.
+    """
+    def one(pair: Tuple[str, str]) -> bool:
+        try:
+            copy(*pair)
+            return True
+        except OSError as e:
+            if not ignore_errors:
+                raise
+            logger.debug("Skipping %s: %s", pair[0], e)
+            return False
+
+    if len(pairs) < _PARALLEL_COPY_MIN:
+        return sum(one(p) for p in pairs)
+    return sum(_copy_pool().map(one, pairs))
+
+
+def _raise(e: OSError) -> None:
+    raise e
+
+
+def _copytree(src: Union[str, Path], dst: Union[str, Path], copy: Callable[[str, str], Any] = _fast_copy2) -> None:
+    """shutil.copytree(src, dst, dirs_exist_ok=True), with the files copied together on _copy_files.
+
+    Directories are created up front and their mode/times applied only after
+    every file is in place, deepest first: copytree's per-directory copystat
+    would otherwise make a read-only source dir read-only before its files
+    land, and leave the copied dirs with the wrong mtimes. Like copytree
+    (symlinks=False), links to files and dirs are followed.
+    """
+    src, dst = os.fspath(src), os.fspath(dst)
+    pairs: List[Tuple[str, str]] = []
+    dirs: List[Tuple[str, str]] = []
+    for root, _, filenames in os.walk(src, onerror=_raise, followlinks=True):
+        target = os.path.normpath(os.path.join(dst, os.path.relpath(root, src)))
+        os.makedirs(target, exist_ok=True)
+        dirs.append((root, target))
+        pairs.extend((os.path.join(root, f), os.path.join(target, f)) for f in filenames)
+    _copy_files(pairs, copy)
+    for src_dir, dst_dir in reversed(dirs):
+        shutil.copystat(src_dir, dst_dir)
+
+
+# Skip `apt-get update` when package lists were refreshed this recently (seconds)
+_APT_METADATA_MAX_AGE = 3600
+_APT_UPDATE_STAMP = Path("/var/lib/apt/periodic/update-success-stamp")
+_APT_LISTS_DIR = Path("/var/lib/apt/lists")
+# Set once this process has run apt-get update / install
+_apt_updated = False
+
+
+def _apt_metadata_fresh() -> bool:
+    """Return True if apt's package lists were updated within _APT_METADATA_MAX_AGE.
+
+    update-success-stamp is written only by a successful update. Without it the
+    lists dir's mtime counts only while the dir holds *_Packages* files: the usual
+    Dockerfile cleanup `rm -rf /var/lib/apt/lists/*` bumps that mtime too, and an
+    image without package lists needs an update before anything installs.
+    """
+    now = time.time()
+    try:
+        if now - _APT_UPDATE_STAMP.stat().st_mtime < _APT_METADATA_MAX_AGE:
+            return True
+    except OSError:
+        pass
+    try:
+        if now - _APT_LISTS_DIR.stat().st_mtime >= _APT_METADATA_MAX_AGE:
+            return False
+        with os.scandir(_APT_LISTS_DIR) as it:
+            return any('_Packages' in e.name for e in it)
+    except OSError:
+        return False
+
+class _StatCache:
+    """Directory listings memoized for the artifact-copy helpers of one build.
+
+    Several helpers inspect the same output dirs (target/release, build/libs,
+    zig-out/bin, ...); a cached scandir answers "does it exist" and "what is
+    in it" together. Listings go stale once anything writes to the tree, so
+    forge clears the cache before every command step and when the build ends.
+    """
+    def __init__(self) -> None:
+        self._listings: Dict[str, Optional[List["os.DirEntry[str]"]]] = {}
+
+    def listdir(self, path: Union[str, Path]) -> Optional[List["os.DirEntry[str]"]]:
+        """Return the entries of `path`, or None if it is not a directory."""
+        key = os.fspath(path)
+        if key not in self._listings:
+            try:
+                with os.scandir(key) as it:
+                    self._listings[key] = list(it)
+            except (FileNotFoundError, NotADirectoryError):
+                self._listings[key] = None
+        return self._listings[key]
+
+    def clear(self) -> None:
+        self._listings.clear()
+
+
+# Shared by the AutoBuilder copy steps; build steps are called as (build_path, install_path)
+_stat_cache = _StatCache()
+
 # --- Auto-Discovery Build Engine ---
 
 class AutoBuilder:
@@ -418,6 +1406,7 @@ class AutoBuilder:
     without requiring a formula file.
     """
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _get_parallel_jobs() -> str:
         """Return the number of parallel jobs to use for builds (e.g. -j4)."""
         count = os.cpu_count()
@@ -426,11 +1415,24 @@ class AutoBuilder:
         return str(count)
 
     @staticmethod
-    def detect(source_path: Path, install_prefix: Path) -> Tuple[List[Union[str, Callable[[Path, Path], None]]], List[str], Dict[str, Any]]:
-        steps = []
+    def detect(source_path: Path, install_prefix: Path) -> Tuple[List[BuildStep], List[str], Dict[str, Any]]:
+        """Return (steps, binaries, metadata) for building source_path into install_prefix.
+
+        Generated steps are argv lists (run without a shell) unless they need
+        shell features such as `|| true` or globbing; anvil.json steps are
+        passed through as written.
+        """
+        steps: List[BuildStep] = []
         metadata = {}
+        # Snapshot the top-level entries once so the probes below are in-memory
+        # membership tests instead of one stat() per candidate file.
+        try:
+            with os.scandir(source_path) as it:
+                entries = {e.name: e for e in it}
+        except OSError:
+            entries = {}
         # 1. Check for explicit 'anvil.json' in the repo (The "Gold Standard")
-        if (source_path / "anvil.json").exists():
+        if "anvil.json" in entries:
             with open(source_path / "anvil.json", encoding='utf-8') as f:
                 data = json.load(f)
                 build_deps = data.get("build_dependencies", [])
@@ -439,76 +1441,71 @@ class AutoBuilder:
                 metadata['msvc_runtime'] = data.get('msvc_runtime')
                 metadata['force_pic'] = data.get('force_pic')
                 return data.get("build", {}).get("common", []), data.get("binaries", []), metadata
-        elif (source_path / "setup.py").exists():
+        elif "setup.py" in entries:
             Colors.print("Detected Python project (setup.py)", Colors.OKBLUE)
             steps = [
-                f"{sys.executable} -m pip install . --target {install_prefix} --upgrade"
+                [*_PIP_INSTALL, ".", "--target", str(install_prefix), "--upgrade"]
             ]
             return steps, [], metadata
-        elif (source_path / "requirements.txt").exists():
+        elif "requirements.txt" in entries:
             Colors.print("Detected Python requirements", Colors.OKBLUE)
-            steps = [f"{sys.executable} -m pip install -r requirements.txt --target {install_prefix}"]
+            steps = [[*_PIP_INSTALL, "-r", "requirements.txt", "--target", str(install_prefix)]]
             return steps, [], metadata
         # Handle Autotools (configure script)
-        elif (source_path / "configure").exists():
+        elif "configure" in entries:
             Colors.print("Detected Autotools project (configure)", Colors.OKBLUE)
             install_prefix_str = str(install_prefix).replace('\\', '/')
             steps = [
-                f"./configure --prefix=\"{install_prefix_str}\"",
-                f"make -j{AutoBuilder._get_parallel_jobs()}",
-                f"make install"
+                ["./configure", f"--prefix={install_prefix_str}"],
+                ["make", f"-j{AutoBuilder._get_parallel_jobs()}"],
+                ["make", "install"]
             ]
             return steps, [], metadata
         # Handle Makefile variants (GNUmakefile, Makefile, makefile)
-        elif any((source_path / name).exists() for name in ("Makefile", "GNUmakefile", "makefile")):
+        elif entries.keys() & {"Makefile", "GNUmakefile", "makefile"}:
             Colors.print("Detected Makefile", Colors.OKBLUE)
             # Determine which make binary is available (gmake, make, mingw32-make, nmake)
-            make_bin = shutil.which("make") or shutil.which("gmake") or shutil.which("mingw32-make") or shutil.which("nmake")
+            make_bin = _which("make") or _which("gmake") or _which("mingw32-make") or _which("nmake")
             if not make_bin:
                 Colors.print("Make not found on PATH. Please install build tools or use anvil.json.", Colors.WARNING)
                 return [], [], metadata
             
-            jobs = f"-j{AutoBuilder._get_parallel_jobs()}"
             # nmake doesn't support -j
-            if "nmake" in make_bin:
-                jobs = ""
+            jobs = [] if "nmake" in make_bin else [f"-j{AutoBuilder._get_parallel_jobs()}"]
 
             install_prefix_str = str(install_prefix)
             # On many projects, 'make install' responds to PREFIX= or DESTDIR=.
             # We prefer to only run 'make install' when an 'install' target exists; otherwise,
             # we run 'make' and copy any produced build artifacts to the install directory.
             install_target = False
-            for name in ("Makefile", "GNUmakefile", "makefile"):
-                mf = source_path / name
-                if mf.exists():
-                    try:
-                        content = mf.read_text(encoding='utf-8')
-                        if "\ninstall:" in content or content.startswith("install:"):
-                            install_target = True
-                            break
-                    except (OSError, UnicodeDecodeError):
-                        # If we cannot read the file, assume no install target
-                        install_target = False
-            steps = [f"{make_bin} {jobs}"]
+            # Only the first present variant is scanned: one mapped read, no decoding
+            mf_entry = next(entries[n] for n in ("Makefile", "GNUmakefile", "makefile") if n in entries)
+            try:
+                with _mapped_file(mf_entry.path) as data:
+                    install_target = _MAKE_INSTALL_RE.search(data) is not None
+            except (OSError, ValueError):
+                # If we cannot read the file, assume no install target
+                install_target = False
+            steps = [[make_bin, *jobs]]
             if install_target:
                 steps.extend([
-                    f"{make_bin} install PREFIX=\"{install_prefix_str}\"",
-                    f"{make_bin} install DESTDIR=\"{install_prefix_str}\"",
+                    [make_bin, "install", f"PREFIX={install_prefix_str}"],
+                    [make_bin, "install", f"DESTDIR={install_prefix_str}"],
                 ])
             else:
                 # We'll rely on a generic copy step to collect built binaries
                 # If this is a go module, prefer running `go build` to produce a binary
-                if (source_path / 'go.mod').exists():
+                if "go.mod" in entries:
                     bin_name = source_path.name
-                    steps.append(f"go build -o \"{install_prefix / 'bin' / bin_name}\" ./...")
+                    steps.append(["go", "build", "-o", str(install_prefix / 'bin' / bin_name), "./..."])
                     return steps, [bin_name], metadata
                 steps.append(AutoBuilder._copy_build_bins)
             return steps, [], metadata
-        if (source_path / "CMakeLists.txt").exists():
+        if "CMakeLists.txt" in entries:
             Colors.print("Detected CMake project", Colors.OKBLUE)
-            cmake_args = f"-DCMAKE_INSTALL_PREFIX={install_prefix}"
+            cmake_args = [f"-DCMAKE_INSTALL_PREFIX={install_prefix}"]
             # If building on Windows with MSVC, select the matching runtime.
-            if os.name == 'nt':
+            if _IS_WIN:
                 # Prefer env var override; otherwise default to MultiThreadedDLL.
                 requested = os.environ.get('ANVIL_MSVC_RUNTIME', '').strip().upper()
                 requested = metadata.get('msvc_runtime', requested) if metadata else requested
@@ -516,162 +1513,171 @@ class AutoBuilder:
                     cmake_flag = 'MultiThreaded'
                 else:
                     cmake_flag = 'MultiThreadedDLL'
-                cmake_args += f" -DCMAKE_MSVC_RUNTIME_LIBRARY={cmake_flag} -A x64"
+                cmake_args += [f"-DCMAKE_MSVC_RUNTIME_LIBRARY={cmake_flag}", "-A", "x64"]
                 # Use PowerShell style make (nmake/mingw) automatically should be chosen by the project's CMake
+            # -S/-B and --build/--install replace `mkdir build && cd build && ...`
+            # so each step is a single process with no shell, on any generator.
             steps = [
-                "mkdir -p build",
-                f"cd build && cmake .. {cmake_args}",
-                f"cd build && make -j{AutoBuilder._get_parallel_jobs()}",
-                "cd build && make install"
+                ["cmake", "-S", ".", "-B", "build", *cmake_args],
+                ["cmake", "--build", "build", "--parallel", AutoBuilder._get_parallel_jobs()],
+                ["cmake", "--install", "build"]
             ]
             return steps, [], metadata
-        elif (source_path / "Cargo.toml").exists():
+        elif "Cargo.toml" in entries:
             Colors.print("Detected Rust project", Colors.OKBLUE)
             is_virtual_workspace = False
             try:
-                with open(source_path / "Cargo.toml", 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if "[workspace]" in content and "[package]" not in content:
-                        is_virtual_workspace = True
-            except (OSError, UnicodeDecodeError):
+                with _mapped_file(source_path / "Cargo.toml") as data:
+                    tables = set(_CARGO_TABLE_RE.findall(data))
+                    is_virtual_workspace = tables == {b"workspace"}
+            except (OSError, ValueError):
                 # If reading the file fails, treat as not a workspace and continue
                 pass
             # Workspace: build all, then copy any bins and libs
             if is_virtual_workspace:
                 Colors.print("Detected Cargo Workspace. Building release target...", Colors.OKBLUE)
                 steps = [
-                    "cargo build --release",
+                    ["cargo", "build", "--release"],
                     AutoBuilder._copy_cargo_bins,
                     AutoBuilder._copy_cargo_libs
                 ]
             else:
                 # Single package: determine if it's a binary or library
                 if AutoBuilder._has_cargo_binary(source_path):
-                    steps = [f"cargo install --path . --root {install_prefix}"]
+                    steps = [["cargo", "install", "--path", ".", "--root", str(install_prefix)]]
                 else:
                     Colors.print("Detected Rust library crate. Building release and copying library artifacts...", Colors.OKBLUE)
                     steps = [
-                        "cargo build --release",
+                        ["cargo", "build", "--release"],
                         AutoBuilder._copy_cargo_libs
                     ]
             return steps, [], metadata
-        elif (source_path / "go.mod").exists() or (source_path / "main.go").exists() or any(source_path.glob("*.go")):
+        elif "go.mod" in entries or any(n.endswith(".go") for n in entries):
             Colors.print("Detected Go project (go.mod)", Colors.OKBLUE)
             # Prefer module-aware install if go 1.18+ and module path; otherwise build
             # If there's a single main package with main.go, we'll build a single binary
             # Only build a binary if main.go or cmd/ exists
-            if (source_path / 'main.go').exists() or ((source_path / 'cmd').exists() and any((source_path / 'cmd').rglob('*.go'))):
+            if "main.go" in entries or ("cmd" in entries and any(e.name.endswith('.go') for e in _scandir_recursive(entries["cmd"].path))):
                 binary_name = source_path.name
                 steps = [
-                    f"go build -o \"{install_prefix / 'bin' / binary_name}\"",
+                    ["go", "build", "-o", str(install_prefix / 'bin' / binary_name)],
                 ]
                 return steps, [binary_name], metadata
             else:
                 Colors.print('No Go binary found (library-only module). Skipping direct build.', Colors.WARNING)
                 return [], [], metadata
-        elif (source_path / "package.json").exists():
+        elif "package.json" in entries:
             Colors.print("Detected Node.js project (package.json)", Colors.OKBLUE)
             steps = [
-                "npm install",
+                ["npm", "install"],
                 "npm run build || true"
             ]
             return steps, [], metadata
-        elif (source_path / "pyproject.toml").exists():
+        elif "pyproject.toml" in entries:
             Colors.print("Detected Python project (pyproject.toml)", Colors.OKBLUE)
             steps = [
-                f"{sys.executable} -m pip install . --target {install_prefix} --upgrade"
+                [*_PIP_INSTALL, ".", "--target", str(install_prefix), "--upgrade"]
             ]
             return steps, [], metadata
             return steps, [], metadata
-        elif (source_path / "build.ninja").exists():
+        elif "build.ninja" in entries:
             Colors.print("Detected Ninja project (build.ninja)", Colors.OKBLUE)
             steps = [
-                f"ninja -j{AutoBuilder._get_parallel_jobs()}",
-                f"ninja install || true"
+                ["ninja", f"-j{AutoBuilder._get_parallel_jobs()}"],
+                "ninja install || true"
             ]
             return steps, [], metadata
-        elif (source_path / "meson.build").exists():
+        elif "meson.build" in entries:
             Colors.print("Detected Meson project (meson.build)", Colors.OKBLUE)
             steps = [
-                "meson setup build",
-                "ninja -C build",
+                ["meson", "setup", "build"],
+                ["ninja", "-C", "build"],
                 f"ninja -C build install --destdir={install_prefix} || true"
             ]
             return steps, [], metadata
-        elif any(source_path.glob("*.gemspec")):
+        elif any(n.endswith(".gemspec") for n in entries):
             Colors.print("Detected Ruby project (*.gemspec)", Colors.OKBLUE)
-            gem = next(source_path.glob("*.gemspec"))
+            gem = next(n for n in entries if n.endswith(".gemspec"))
             steps = [
-                f"gem build {gem.name}",
+                ["gem", "build", gem],
                 f"gem install *.gem --install-dir {install_prefix} --bindir {install_prefix}/bin --no-document"
             ]
             return steps, [], metadata
-        elif (source_path / "Package.swift").exists():
+        elif "Package.swift" in entries:
             Colors.print("Detected Swift project (Package.swift)", Colors.OKBLUE)
             steps = [
-                "swift build -c release",
+                ["swift", "build", "-c", "release"],
                 AutoBuilder._copy_swift_artifacts
             ]
             return steps, [], metadata
-        elif (source_path / "SConstruct").exists():
+        elif "SConstruct" in entries:
             Colors.print("Detected SCons project (SConstruct)", Colors.OKBLUE)
             steps = [
-                f"scons PREFIX={install_prefix}",
+                ["scons", f"PREFIX={install_prefix}"],
                 f"scons install PREFIX={install_prefix} || true"
             ]
             return steps, [], metadata
-        elif (source_path / "build.gradle").exists() or (source_path / "gradlew").exists():
+        elif "build.gradle" in entries or "gradlew" in entries:
             Colors.print("Detected Gradle project (build.gradle)", Colors.OKBLUE)
-            gradle_cmd = "./gradlew" if (source_path / "gradlew").exists() else "gradle"
+            gradle_cmd = "./gradlew" if "gradlew" in entries else "gradle"
             steps = [
-                f"{gradle_cmd} build",
+                [gradle_cmd, "build"],
                 AutoBuilder._copy_gradle_artifacts
             ]
             return steps, [], metadata
-        elif (source_path / "WORKSPACE").exists() or (source_path / "BUILD").exists():
+        elif "WORKSPACE" in entries or "BUILD" in entries:
             Colors.print("Detected Bazel project (WORKSPACE/BUILD)", Colors.OKBLUE)
             steps = [
-                "bazel build //...",
+                ["bazel", "build", "//..."],
                 AutoBuilder._copy_bazel_artifacts
             ]
             return steps, [], metadata
-        elif any(source_path.glob('*.csproj')):
+        elif any(n.endswith('.csproj') for n in entries):
             Colors.print("Detected .NET project (csproj)", Colors.OKBLUE)
             steps = [
-                f"dotnet publish -c Release -o {install_prefix}"
+                ["dotnet", "publish", "-c", "Release", "-o", str(install_prefix)]
             ]
             return steps, [], metadata
-        elif (source_path / "build.zig").exists() or (source_path / "zig.toml").exists():
+        elif "build.zig" in entries or "zig.toml" in entries:
             Colors.print("Detected Zig project (build.zig)", Colors.OKBLUE)
             steps = [
-                "zig build -Drelease-safe",
+                ["zig", "build", "-Drelease-safe"],
                 AutoBuilder._copy_zig_artifacts
             ]
             return steps, [], metadata
-        elif (source_path / "pom.xml").exists():
+        elif "pom.xml" in entries:
             Colors.print("Detected Java project (pom.xml)", Colors.OKBLUE)
             steps = [
-                "mvn package",
+                ["mvn", "package"],
                 AutoBuilder._copy_maven_artifacts
             ]
             return steps, [], metadata
         else:
-            # Archives (.tar.xz, .7z, etc.)
-            for ext in [".tar.xz", ".7z", ".tar.bz2", ".tar.gz", ".tgz", ".tar", ".zip"]:
-                for file in source_path.glob(f"*{ext}"):
-                    Colors.print(f"Detected archive: {file.name}", Colors.OKBLUE)
-                    if ext == ".zip":
-                        steps = [f"unzip -o {file} -d {install_prefix}"]
-                    else:
-                        steps = [f"tar -xf {file} -C {install_prefix}"]
-                    return steps, [], metadata
-            if (source_path / ".hg").exists():
+            # Archives (.tar.xz, .7z, etc.): one pass over the snapshot, keeping the
+            # first entry of the highest-priority suffix
+            archives = sorted(
+                ((rank, entry) for entry in entries.values()
+                 for rank, ext in enumerate(_SOURCE_ARCHIVE_SUFFIXES) if entry.name.endswith(ext)),
+                key=lambda m: m[0])
+            for rank, entry in archives:
+                if not entry.is_file():
+                    continue
+                Colors.print(f"Detected archive: {entry.name}", Colors.OKBLUE)
+                if _SOURCE_ARCHIVE_SUFFIXES[rank] == ".7z":
+                    # bsdtar reads 7z; the stdlib does not
+                    steps = [["tar", "-xf", entry.path, "-C", str(install_prefix)]]
+                else:
+                    # tar/zip unpack in-process, with no tar/unzip fork
+                    steps = [functools.partial(_extract_source_archive, entry.name)]
+                return steps, [], metadata
+            if ".hg" in entries:
                 Colors.print("Detected Mercurial repository", Colors.OKBLUE)
-                steps = ["hg pull", "hg update"]
+                # pull -u updates in the same process as the pull
+                steps = [["hg", "pull", "-u"]]
                 return steps, [], metadata
-            if (source_path / ".svn").exists():
+            if ".svn" in entries:
                 Colors.print("Detected SVN repository", Colors.OKBLUE)
-                steps = ["svn update"]
+                steps = [["svn", "update"]]
                 return steps, [], metadata
             Colors.print("No build system detected. Copying files as-is.", Colors.WARNING)
             steps = [AutoBuilder._copy_all]
@@ -686,12 +1692,16 @@ class AutoBuilder:
         if not deps:
             return
         Colors.print(f"Installing build dependencies: {', '.join(deps)}", Colors.OKBLUE)
-        if platform.system() == "Linux":
-            run_cmd(f"sudo apt-get update && sudo apt-get install -y {' '.join(deps)}")
-        elif platform.system() == "Darwin":
-            run_cmd(f"brew install {' '.join(deps)}")
-        elif platform.system() == "Windows":
-            run_cmd(f"choco install {' '.join(deps)}")
+        if _PLATFORM == "Linux":
+            global _apt_updated
+            if not (_apt_updated or _apt_metadata_fresh()):
+                run_cmd(["sudo", "apt-get", "update"])
+            run_cmd(["sudo", "apt-get", "install", "-y", *deps])
+            _apt_updated = True
+        elif _PLATFORM == "Darwin":
+            run_cmd(["brew", "install", *deps])
+        elif _PLATFORM == "Windows":
+            run_cmd(["choco", "install", *deps])
         else:
             Colors.print("Unknown platform for dependency installation.", Colors.WARNING)
 
@@ -704,30 +1714,32 @@ class AutoBuilder:
         bin_dir = install_path / "bin"
         bin_dir.mkdir(parents=True, exist_ok=True)
 
-        if not release_dir.exists():
+        listing = _stat_cache.listdir(release_dir)
+        if listing is None:
             Colors.print(f"Build failed: {release_dir} does not exist", Colors.FAIL)
             return
 
-        count = 0
-        for item in release_dir.iterdir():
+        pairs: List[Tuple[str, str]] = []
+        for item in listing:
             if not item.is_file():
                 continue
 
             # Windows: Check for .exe
-            if os.name == 'nt':
-                if item.suffix == '.exe':
-                    Colors.print(f"Copying {item.name}...", Colors.OKBLUE)
-                    shutil.copy(item, bin_dir)
-                    count += 1
+            if _IS_WIN:
+                if item.name.endswith('.exe'):
+                    Colors.detail("Copying %s...", item.name)
+                    pairs.append((item.path, os.path.join(bin_dir, item.name)))
             # Unix: Check for executable permission and no extension (usually)
             else:
-                if os.access(item, os.X_OK) and '.' not in item.name:
-                    Colors.print(f"Copying {item.name}...", Colors.OKBLUE)
-                    shutil.copy(item, bin_dir)
-                    count += 1
+                if os.access(item.path, os.X_OK) and '.' not in item.name:
+                    Colors.detail("Copying %s...", item.name)
+                    pairs.append((item.path, os.path.join(bin_dir, item.name)))
+        count = _copy_files(pairs)
 
         if count == 0:
             Colors.print("Warning: No executables found in target/release", Colors.WARNING)
+        else:
+            Colors.print(f"Copied {count} executable(s) from target/release", Colors.OKBLUE)
 
     @staticmethod
     def _copy_build_bins(build_path, install_path):
@@ -739,38 +1751,54 @@ class AutoBuilder:
         """
         bin_dir = install_path / 'bin'
         bin_dir.mkdir(parents=True, exist_ok=True)
-        locations = [build_path, build_path / 'bin', build_path / 'build', build_path / 'dist', build_path / 'target' / 'release', build_path / 'cmd']
-        found = 0
+        # dest -> src; a later artifact with the same name wins, as with serial copies
+        pairs: Dict[str, str] = {}
+        copied: List[str] = []
         probable_names = {build_path.name, install_path.name}
         probable_names.add(f"{build_path.name}.exe")
         probable_names.add(f"{install_path.name}.exe")
 
+        # Walk each distinct tree once: one batched directory read per directory
+        # (FindFirstFileExW on Windows). The usual output dirs normally live under
+        # build_path and are covered by its walk; one that is a symlink out of the
+        # tree (the walk does not follow those) resolves elsewhere and gets its own root.
+        locations = [build_path, build_path / 'bin', build_path / 'build', build_path / 'dist', build_path / 'target' / 'release', build_path / 'cmd']
+        resolved = []
         for loc in locations:
-            if not loc.exists():
+            try:
+                resolved.append(loc.resolve(strict=True))
+            except (OSError, RuntimeError):
                 continue
-            for item in loc.rglob('*'):
-                if not item.is_file():
+        roots: List[Path] = []
+        for loc in sorted(resolved, key=lambda p: len(p.parts)):
+            if not any(loc == r or r in loc.parents for r in roots):
+                roots.append(loc)
+        for entry in (e for root in roots for e in _scandir_recursive(root, _is_cargo_intermediate)):
+            # Windows: check for .exe, else check unix executable bit and skip typical extensions
+            try:
+                if not entry.is_file():
                     continue
-                # Windows: check for .exe, else check unix executable bit and skip typical extensions
-                try:
-                    if os.name == 'nt':
-                        if item.suffix.lower() == '.exe' or item.name in probable_names:
-                            Colors.print(f"Copying build artifact {item.name}...", Colors.OKBLUE)
-                            shutil.copy(item, bin_dir)
-                            found += 1
-                    else:
-                        if os.access(item, os.X_OK) or item.name in probable_names:
-                            # Avoid copying common archive files or scripts with extensions
-                            if item.suffix in ['.py', '.sh', '.txt', '.md', '.c', '.h', '.o', '.a', '.so', '.dll', '.dylib']:
-                                continue
-                            Colors.print(f"Copying build artifact {item.name}...", Colors.OKBLUE)
-                            shutil.copy(item, bin_dir)
-                            found += 1
-                except OSError:
-                    # ignore copy errors for individual files
-                    pass
+                suffix = os.path.splitext(entry.name)[1]
+                if _IS_WIN:
+                    if suffix.lower() == '.exe' or entry.name in probable_names:
+                        copied.append(entry.name)
+                        pairs[str(bin_dir / entry.name)] = entry.path
+                else:
+                    if os.access(entry.path, os.X_OK) or entry.name in probable_names:
+                        # Avoid copying common archive files or scripts with extensions
+                        if suffix in _SKIP_SUFFIXES:
+                            continue
+                        copied.append(entry.name)
+                        pairs[str(bin_dir / entry.name)] = entry.path
+            except OSError:
+                # ignore errors for individual files
+                pass
+        Colors.details("Copying build artifact %s...", copied)
+        found = _copy_files([(src, dst) for dst, src in pairs.items()], ignore_errors=True)
         if found == 0:
             Colors.print("Warning: No build artifacts found to copy", Colors.WARNING)
+        else:
+            Colors.print(f"Copied {found} build artifact(s)", Colors.OKBLUE)
 
     @staticmethod
     def _copy_cargo_libs(build_path, install_path):
@@ -781,29 +1809,51 @@ class AutoBuilder:
         lib_dir = install_path / "lib"
         lib_dir.mkdir(parents=True, exist_ok=True)
 
-        if not release_dir.exists():
+        listing = _stat_cache.listdir(release_dir)
+        if listing is None:
             Colors.print(f"Build failed: {release_dir} does not exist", Colors.FAIL)
             return
 
-        patterns = ["*.rlib", "*.a", "*.so", "*.dll", "*.dylib"]
-        count = 0
-        for pat in patterns:
-            for item in release_dir.glob(pat):
-                if item.is_file():
-                    Colors.print(f"Copying lib {item.name}...", Colors.OKBLUE)
-                    shutil.copy(item, lib_dir)
-                    count += 1
+        suffixes = [".rlib", ".a", ".so", ".dll", ".dylib"]
+        pairs: List[Tuple[str, str]] = []
+        for suffix in suffixes:
+            for item in listing:
+                if item.name.endswith(suffix) and item.is_file():
+                    Colors.detail("Copying lib %s...", item.name)
+                    pairs.append((item.path, os.path.join(lib_dir, item.name)))
+        count = _copy_files(pairs)
 
         if count == 0:
             Colors.print("Warning: No library artifacts found in target/release", Colors.WARNING)
+        else:
+            Colors.print(f"Copied {count} library artifact(s) from target/release", Colors.OKBLUE)
 
     @staticmethod
     def _copy_all(build_path, install_path):
-        """Copy all files from build_path to install_path."""
+        """Copy all files from build_path to install_path.
+
+        build_path is scratch space that forge deletes afterwards, so when
+        install_path is still empty and on the same filesystem the whole tree
+        is moved with a single rename instead of being copied file by file.
+        """
         Colors.print(f"Copying all files to {install_path}...", Colors.OKBLUE)
+        try:
+            same_fs = os.stat(build_path).st_dev == os.stat(install_path.parent).st_dev
+        except OSError:
+            same_fs = False
+        if same_fs and not _dir_nonempty(install_path):
+            try:
+                if install_path.exists():
+                    install_path.rmdir()
+                os.rename(build_path, install_path)
+                return
+            except OSError as e:
+                logger.debug("Rename of %s failed (%s); copying instead", build_path, e)
+                install_path.mkdir(parents=True, exist_ok=True)
         if hasattr(shutil, 'copytree'):
-            # Python 3.8+ handles existing dest with dirs_exist_ok=True
-            shutil.copytree(build_path, install_path, dirs_exist_ok=True)
+            # Merges into an existing install_path like copytree(dirs_exist_ok=True);
+            # the files are copied together so their I/O overlaps.
+            _copytree(build_path, install_path)
         else:
             # Fallback for older python if needed, though 3.12 is required per comments
             # But let's be safe: iterate and copy
@@ -812,92 +1862,144 @@ class AutoBuilder:
                 if item.is_dir():
                     if dest.exists():
                         safe_rmtree(dest)
-                    shutil.copytree(item, dest)
+                    shutil.copytree(item, dest, copy_function=_fast_copy2)
                 else:
-                    shutil.copy2(item, dest)
+                    _fast_copy2(item, dest)
 
     @staticmethod
     def _copy_gradle_artifacts(build_path, install_path):
-        src = build_path / "build" / "libs"
-        if not src.exists(): return
-        for item in src.iterdir():
-            shutil.copy2(item, install_path)
+        listing = _stat_cache.listdir(build_path / "build" / "libs")
+        if listing is None: return
+        for item in listing:
+            _fast_copy2(item.path, install_path)
 
     @staticmethod
     def _copy_bazel_artifacts(build_path, install_path):
         src = build_path / "bazel-bin"
         if not src.exists(): return
         if hasattr(shutil, 'copytree'):
-             shutil.copytree(src, install_path, dirs_exist_ok=True)
+             shutil.copytree(src, install_path, dirs_exist_ok=True, copy_function=_fast_copy2)
 
     @staticmethod
     def _copy_zig_artifacts(build_path, install_path):
-        src = build_path / "zig-out" / "bin"
         dest = install_path / "bin"
         dest.mkdir(parents=True, exist_ok=True)
-        if not src.exists(): return
-        for item in src.iterdir():
-            shutil.copy2(item, dest)
+        listing = _stat_cache.listdir(build_path / "zig-out" / "bin")
+        if listing is None: return
+        for item in listing:
+            _fast_copy2(item.path, dest)
 
     @staticmethod
     def _copy_maven_artifacts(build_path, install_path):
-        src = build_path / "target"
-        if not src.exists(): return
-        for item in src.glob("*.jar"):
-            shutil.copy2(item, install_path)
+        listing = _stat_cache.listdir(build_path / "target")
+        if listing is None: return
+        for item in listing:
+            if item.name.endswith(".jar"):
+                _fast_copy2(item.path, install_path)
 
     @staticmethod
     def _copy_swift_artifacts(build_path, install_path):
-        src = build_path / ".build" / "release"
         dest = install_path / "bin"
         dest.mkdir(parents=True, exist_ok=True)
-        if not src.exists(): return
-        for item in src.iterdir():
-             if item.is_file() and os.access(item, os.X_OK):
-                shutil.copy2(item, dest)
-             elif os.name == 'nt' and item.suffix == '.exe':
-                shutil.copy2(item, dest)
+        listing = _stat_cache.listdir(build_path / ".build" / "release")
+        if listing is None: return
+        for item in listing:
+             if item.is_file() and os.access(item.path, os.X_OK):
+                _fast_copy2(item.path, dest)
+             elif _IS_WIN and item.name.endswith('.exe'):
+                _fast_copy2(item.path, dest)
 
     @staticmethod
     def _has_cargo_binary(source_path):
         """Return True if this Cargo package has any binary targets (bins or src/main.rs).
         Uses heuristics: existence of src/main.rs, src/bin/*, or [[bin]] in Cargo.toml.
         """
-        # 1. main.rs
-        if (source_path / "src" / "main.rs").exists():
+        # 1./2. One listing of src/ answers both: main.rs, or a non-empty src/bin
+        try:
+            with os.scandir(source_path / "src") as it:
+                src_entries = {e.name: e for e in it}
+        except OSError:
+            src_entries = {}
+        if "main.rs" in src_entries:
             return True
-        # 2. src/bin directory exists and has files
-        bin_dir = source_path / "src" / "bin"
-        if bin_dir.exists() and any(bin_dir.iterdir()):
+        if "bin" in src_entries and _dir_nonempty(Path(src_entries["bin"].path)):
             return True
-        # 3. explicit [[bin]] entries in Cargo.toml
+        # 3. explicit [[bin]] entries in Cargo.toml (byte scan, no decoding)
         try:
-            toml_path = source_path / "Cargo.toml"
-            if toml_path.exists():
-                content = toml_path.read_text(encoding='utf-8')
-                if "[[bin]]" in content:
+            with _mapped_file(source_path / "Cargo.toml") as data:
+                if _CARGO_BIN_RE.search(data):
                     return True
-        except (OSError, UnicodeDecodeError):
-            # File not found or decode error - treat as no explicit [[bin]] entries
+        except (OSError, ValueError):
+            # File not found or unmappable - treat as no explicit [[bin]] entries
             pass
         return False
 
 
 # --- Index Management ---
 
+# git@host:owner/repo(.git) -- scp-like SSH remote syntax
+_SSH_URL_RE = re.compile(r'git@([^:]*):(.*)', re.DOTALL)
+# URLs normalize_url would return unchanged: https, lower-case ASCII, no
+# port/user, no query/fragment/params, no trailing slash (.git is checked separately)
+_CANONICAL_URL_RE = re.compile(r'https://[a-z0-9.\-]+/[^A-Z\s?#;]*[^A-Z\s?#;/]')
+
+
 class RepoIndex:
     """Manage the local sqlite index of repository metadata and sync with the central index."""
     def __init__(self):
         self.db_path = INDEX_DIR / "index.db"
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Set once the trigram full-text index over name/description is known to exist
+        self._fts = False
         self._ensure_exists()
 
+    def _get_conn(self) -> sqlite3.Connection:
+        """Return the index's shared connection, opening it on first use.
+
+        One connection serves every lookup in a run instead of a
+        connect/close (and cold page cache) per query.
+        """
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            # index.db is a tracked file in the index's git worktree, replaced by
+            # `git pull`/repair; WAL sidecar files would outlive that swap, so
+            # keep the default rollback journal. synchronous=NORMAL (fewer syncs
+            # than FULL) is safe here: the index is rebuildable from the central repo.
+            # recursive_triggers makes INSERT OR REPLACE fire the delete trigger that
+            # keeps repositories_fts in sync.
+            conn.executescript(
+                "PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY; PRAGMA cache_size=-20000;"
+                " PRAGMA busy_timeout=5000; PRAGMA mmap_size=67108864; PRAGMA recursive_triggers=ON;"
+            )
+            atexit.register(self._close_conn, conn)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _close_conn(conn: sqlite3.Connection) -> None:
+        # PRAGMA optimize refreshes planner statistics only where this
+        # connection's queries showed it would help; cheap when nothing is due.
+        try:
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        conn.close()
+
+    def close(self) -> None:
+        """Close the shared connection (before the DB file is replaced or removed)."""
+        with self._lock:
+            if self._conn is not None:
+                self._close_conn(self._conn)
+                self._conn = None
+
     def _ensure_exists(self):
         if not INDEX_DIR.exists():
             INDEX_DIR.mkdir(parents=True, exist_ok=True)
             try:
                 # Try to clone index, but don't fail if offline/empty
-                run_cmd(f"git clone {INDEX_REPO_URL} .", cwd=INDEX_DIR, verbose=False)
-            except (subprocess.CalledProcessError, OSError):
+                run_cmd(["git", "clone", "--depth", "1", "--no-tags", INDEX_REPO_URL, "."], cwd=INDEX_DIR, verbose=False)
+            except (CommandExecutionError, subprocess.CalledProcessError, OSError):
                 # Ignore clone errors (no network or git missing)
                 pass
 
@@ -912,38 +2014,73 @@ class RepoIndex:
                 pass
 
     def _create_bootstrap_db(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_conn()
         c = conn.cursor()
         c.execute('''CREATE TABLE IF NOT EXISTS repositories
                      (name text PRIMARY KEY, url text, normalized_url text, description text)''')
         # Simple bootstrap
         normalized_init = RepoIndex.normalize_url('https://github.com/sycomix/anvil-core.git')
         c.execute("INSERT OR IGNORE INTO repositories (name, url, normalized_url, description) VALUES ('anvil-core', 'https://github.com/sycomix/anvil-core.git', ?, 'Anvil Core')", (normalized_init,))
-        c.execute("CREATE INDEX IF NOT EXISTS idx_repositories_normalized_url ON repositories(normalized_url)")
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_repositories_normalized_url ON repositories(normalized_url)")
+        self._ensure_fts(c)
         conn.commit()
-        conn.close()
+
+    def _ensure_fts(self, c: sqlite3.Cursor) -> None:
+        """Create the full-text index used by search() and its sync triggers, if missing.
+
+        Uses the trigram tokenizer so MATCH keeps the substring semantics of the
+        LIKE '%q%' scan it replaces. Builds without FTS5/trigram keep using LIKE.
+        """
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='repositories_fts'")
+        if c.fetchone() is None:
+            try:
+                c.execute("CREATE VIRTUAL TABLE repositories_fts USING fts5(name, description, content='repositories', tokenize='trigram')")
+            except sqlite3.OperationalError:
+                self._fts = False
+                return
+            c.execute("CREATE TRIGGER IF NOT EXISTS repositories_ai AFTER INSERT ON repositories BEGIN "
+                      "INSERT INTO repositories_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description); END")
+            c.execute("CREATE TRIGGER IF NOT EXISTS repositories_ad AFTER DELETE ON repositories BEGIN "
+                      "INSERT INTO repositories_fts(repositories_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description); END")
+            c.execute("CREATE TRIGGER IF NOT EXISTS repositories_au AFTER UPDATE OF name, description ON repositories BEGIN "
+                      "INSERT INTO repositories_fts(repositories_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description); "
+                      "INSERT INTO repositories_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description); END")
+            c.execute("INSERT INTO repositories_fts(repositories_fts) VALUES ('rebuild')")
+        self._fts = True
 
     def _migrate_schema(self):
-        """Add normalized_url column if missing and populate existing records."""
-        conn = sqlite3.connect(self.db_path)
+        """Add normalized_url column if missing, backfill it, and index it."""
+        conn = self._get_conn()
         c = conn.cursor()
         try:
             c.execute("PRAGMA table_info(repositories)")
             cols = [row[1] for row in c.fetchall()]
+            changed = False
             if 'normalized_url' not in cols:
                 c.execute("ALTER TABLE repositories ADD COLUMN normalized_url text")
-                # Populate normalized_url for existing rows
-                c.execute("SELECT name, url FROM repositories")
-                rows = c.fetchall()
-                for name, url in rows:
-                    normalized = RepoIndex.normalize_url(url) if url else None
-                    c.execute("UPDATE repositories SET normalized_url=? WHERE name=?", (normalized, name))
-                conn.commit()
-                # Create an index on normalized_url for fast lookups
-                c.execute("CREATE INDEX IF NOT EXISTS idx_repositories_normalized_url ON repositories(normalized_url)")
-                conn.commit()
-        finally:
-            conn.close()
+                changed = True
+            # Populate normalized_url for rows that lack it (legacy rows, rows from the central index)
+            c.execute("SELECT name, url FROM repositories WHERE normalized_url IS NULL AND url IS NOT NULL")
+            rows = c.fetchall()
+            if rows:
+                c.executemany("UPDATE repositories SET normalized_url=? WHERE name=?",
+                              [(RepoIndex.normalize_url(url), name) for name, url in rows])
+                changed = True
+            c.execute("PRAGMA index_list(repositories)")
+            indexes = {row[1]: row[2] for row in c.fetchall()}
+            if 'idx_repositories_normalized_url' not in indexes or (changed and not indexes['idx_repositories_normalized_url']):
+                # UNIQUE lets the storage layer deduplicate inserts; databases that already
+                # hold duplicate URLs keep a plain index so lookups are still indexed.
+                c.execute("DROP INDEX IF EXISTS idx_repositories_normalized_url")
+                try:
+                    c.execute("CREATE UNIQUE INDEX idx_repositories_normalized_url ON repositories(normalized_url)")
+                except sqlite3.IntegrityError:
+                    c.execute("CREATE INDEX idx_repositories_normalized_url ON repositories(normalized_url)")
+            self._ensure_fts(c)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
 
     def ensure_db(self):
         """Public helper to ensure the DB and schema exist.
@@ -953,10 +2090,8 @@ class RepoIndex:
         self._ensure_exists()
 
     def get_url(self, name: str) -> Optional[str]:
-        with sqlite3.connect(self.db_path) as conn:
-            c = conn.cursor()
-            c.execute("SELECT url FROM repositories WHERE name=?", (name,))
-            result = c.fetchone()
+        with self._lock:
+            result = self._get_conn().execute("SELECT url FROM repositories WHERE name=?", (name,)).fetchone()
             return result[0] if result else None
 
     def has_url(self, url: str) -> bool:
@@ -964,49 +2099,76 @@ class RepoIndex:
         if not url:
             return False
         normalized = RepoIndex.normalize_url(url)
-        with sqlite3.connect(self.db_path) as conn:
-            c = conn.cursor()
-            c.execute("SELECT normalized_url, url FROM repositories")
-            rows = c.fetchall()
-            for (row_norm, row_url) in rows:
-                if row_norm and row_norm == normalized:
-                    return True
-                if row_url and RepoIndex.normalize_url(row_url) == normalized:
-                    return True
-            return False
+        with self._lock:
+            row = self._get_conn().execute("SELECT 1 FROM repositories WHERE normalized_url=? LIMIT 1", (normalized,)).fetchone()
+            return row is not None
 
-    def add_local(self, name: str, url: str) -> None:
+    def add_local(self, name: str, url: str) -> bool:
+        """Add a user-submitted repository; return False if its URL was already indexed."""
         # Normalize url before adding to avoid duplicates across formats
         if not url:
             raise ValueError("URL cannot be empty when adding to index")
         normalized = RepoIndex.normalize_url(url)
-        if self.has_url(normalized):
+        with self._lock, self._get_conn() as conn:
+            # The NOT EXISTS guard skips URLs already indexed in the same statement
+            cur = conn.execute(
+                "INSERT OR REPLACE INTO repositories (name, url, normalized_url, description) "
+                "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM repositories WHERE normalized_url=?)",
+                (name, url, normalized, "User added", normalized),
+            )
+            return cur.rowcount > 0
+
+    def _user_rows(self) -> List[Tuple[str, str]]:
+        """Return the (name, url) rows add_local wrote, so they survive index.db being replaced.
+
+        index.db is a tracked file of the index checkout, and update/repair overwrite it
+        with the central copy; these rows are re-added afterwards by _restore_user_rows.
+        """
+        if not self.db_path.exists():
+            return []
+        try:
+            with self._lock:
+                return self._get_conn().execute(
+                    "SELECT name, url FROM repositories WHERE description='User added' AND url IS NOT NULL"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Could not read user-added index entries: %s", e)
+            return []
+
+    def _restore_user_rows(self, rows: List[Tuple[str, str]]) -> None:
+        """Re-add rows saved by _user_rows, skipping URLs the central index now carries."""
+        if not rows:
             return
-        with sqlite3.connect(self.db_path) as conn:
-            c = conn.cursor()
-            c.execute("INSERT OR REPLACE INTO repositories (name, url, normalized_url, description) VALUES (?, ?, ?, ?)", (name, url, normalized, "User added"))
-            conn.commit()
+        try:
+            self._ensure_exists()
+            with self._lock, self._get_conn() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO repositories (name, url, normalized_url, description) "
+                    "SELECT ?, ?, ?, 'User added' WHERE NOT EXISTS (SELECT 1 FROM repositories WHERE normalized_url=?)",
+                    [(name, url, n, n) for name, url in rows for n in (RepoIndex.normalize_url(url),)],
+                )
+        except sqlite3.Error as e:
+            logger.warning("Could not restore %d user-added index entries: %s", len(rows), e)
 
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def normalize_url(url: Optional[str]) -> Optional[str]:
         """Return a canonical normalized URL for easier comparison.
 
         Normalizes forms like git@host:user/repo.git -> https://host/user/repo, strips
         trailing .git and trailing slashes, and lower-cases the host component.
+        Memoized: a run normalizes the same few URLs repeatedly (lookup, insert).
         """
         if not url:
             return url
+        # Fast path: already canonical (the common case for index rows and https remotes)
+        if url.isascii() and _CANONICAL_URL_RE.fullmatch(url) and not url.endswith('.git'):
+            return url
         url = url.strip()
         # ssh style: git@host:user/repo.git
-        if url.startswith('git@'):
-            # Split into host and path
-            try:
-                user_host, path = url.split(':', 1)
-                host = user_host.split('@', 1)[1]
-                url = f"https://{host}/{path}"
-            except (ValueError, IndexError):
-                # Fallback to original
-                pass
+        m = _SSH_URL_RE.fullmatch(url)
+        if m:
+            url = f"https://{m.group(1)}/{m.group(2)}"
         # Replace ssh://git@host/ -> https://host/
         if url.startswith('ssh://'):
             parsed = urllib.parse.urlparse(url)
@@ -1029,10 +2191,23 @@ class RepoIndex:
 
     def search(self, query):
         """Search for repositories matching the query in name or description."""
-        with sqlite3.connect(self.db_path) as conn:
-            c = conn.cursor()
+        with self._lock:
+            conn = self._get_conn()
+            # Trigrams only index substrings of 3+ characters, and LIKE wildcards in
+            # the query have no MATCH equivalent; those cases keep the table scan.
+            if self._fts and len(query) >= 3 and not any(ch in query for ch in '%_'):
+                phrase = '"' + query.replace('"', '""') + '"'
+                try:
+                    c = conn.execute(
+                        "SELECT r.name, r.description, r.url FROM repositories_fts "
+                        "JOIN repositories r ON r.rowid = repositories_fts.rowid "
+                        "WHERE repositories_fts MATCH ? ORDER BY r.rowid", (phrase,))
+                    return c.fetchall()
+                except sqlite3.OperationalError:
+                    # e.g. index.db was just replaced by an index sync
+                    self._fts = False
             pattern = f"%{query}%"
-            c.execute("SELECT name, description, url FROM repositories WHERE name LIKE ? OR description LIKE ?", (pattern, pattern))
+            c = conn.execute("SELECT name, description, url FROM repositories WHERE name LIKE ? OR description LIKE ?", (pattern, pattern))
             return c.fetchall()
 
     def repair(self) -> None:
@@ -1042,14 +2217,17 @@ class RepoIndex:
         It logs user-facing messages and treats failures as non-fatal.
         """
         Colors.print("Repairing local index (reclone)...", Colors.HEADER)
+        user_rows = self._user_rows()
+        self.close()
         try:
             for p in INDEX_DIR.iterdir():
                 safe_rmtree(p)
-            run_cmd(f"git clone {INDEX_REPO_URL} .", cwd=INDEX_DIR, verbose=False)
+            run_cmd(["git", "clone", "--depth", "1", "--no-tags", INDEX_REPO_URL, "."], cwd=INDEX_DIR, verbose=False)
             Colors.print("Local index repaired (recloned).", Colors.OKGREEN)
         except (OSError, CommandExecutionError) as e:
             logger.warning("Index repair failed: %s", getattr(e, 'stderr', str(e)))
             Colors.print("Index repair failed. You can manually remove ~/.anvil/index and run `anvil update`.", Colors.WARNING)
+        self._restore_user_rows(user_rows)
 
     def check(self) -> Tuple[bool, List[str]]:
         """Return (ok, issues) describing the local index health.
@@ -1068,7 +2246,7 @@ class RepoIndex:
             issues.append(".git directory missing — index not cloned")
         else:
             try:
-                out = run_cmd("git rev-parse --is-inside-work-tree", cwd=INDEX_DIR, verbose=False)
+                out = run_cmd(["git", "rev-parse", "--is-inside-work-tree"], cwd=INDEX_DIR, verbose=False)
                 if str(out).strip().lower() != 'true':
                     issues.append("Git reports this is not a work tree")
             except (CommandExecutionError, subprocess.CalledProcessError, OSError) as e:
@@ -1096,7 +2274,7 @@ class RepoIndex:
         if git_dir.exists():
             # Verify the index dir is a valid git working tree
             try:
-                out = run_cmd("git rev-parse --is-inside-work-tree", cwd=INDEX_DIR, verbose=False)
+                out = run_cmd(["git", "rev-parse", "--is-inside-work-tree"], cwd=INDEX_DIR, verbose=False)
                 if str(out).strip().lower() != 'true':
                     raise CommandExecutionError('git rev-parse', 1, out, 'not a work tree')
             except (CommandExecutionError, subprocess.CalledProcessError, OSError) as e:
@@ -1105,13 +2283,24 @@ class RepoIndex:
                 self.repair()
                 return
 
-            # If valid, perform a pull
+            # If valid, sync to the remote tip (which may replace index.db). The index is
+            # metadata only: a depth-1 fetch of the remote HEAD plus a hard reset transfers
+            # just the new tip and skips merge machinery. The reset also discards local
+            # schema migrations of index.db, which would make a pull refuse to merge;
+            # they are reapplied on next use. Rows added by add_local/submit would be
+            # discarded too, so they are saved first and re-added after the reset.
+            user_rows = self._user_rows()
+            self.close()
             try:
-                run_cmd("git pull", cwd=INDEX_DIR, verbose=False)
+                run_cmd(["git", "fetch", "--depth", "1", "--no-tags", "origin", "HEAD"], cwd=INDEX_DIR, verbose=False)
+                run_cmd(["git", "reset", "--hard", "FETCH_HEAD"], cwd=INDEX_DIR, verbose=False)
             except (CommandExecutionError, subprocess.CalledProcessError, OSError) as e:
                 logger.warning("Central index sync failed: %s", getattr(e, 'stderr', str(e)))
                 Colors.print("Could not sync central index (network/auth error). This is non-fatal — you can retry later with `anvil update`.", Colors.WARNING)
                 return
+            finally:
+                # A no-op for rows still present (failed fetch): URLs already indexed are skipped
+                self._restore_user_rows(user_rows)
 
         else:
             # No .git present — try repair (clone)
@@ -1130,11 +2319,21 @@ class Anvil:
         self.auto_submit = str(val).strip().lower() not in ('0', 'false', 'no')
 
     def _setup_dirs(self):
-        for p in [ANVIL_ROOT, BUILD_DIR, INSTALL_DIR, BIN_DIR, INDEX_DIR]:
-            p.mkdir(parents=True, exist_ok=True)
+        # One listdir of the root instead of a stat/mkdir per subdirectory
+        try:
+            existing = set(os.listdir(ANVIL_ROOT))
+        except FileNotFoundError:
+            ANVIL_ROOT.mkdir(parents=True, exist_ok=True)
+            existing = set()
+        for p in [BUILD_DIR, INSTALL_DIR, BIN_DIR, INDEX_DIR]:
+            if p.name not in existing:
+                p.mkdir(parents=True, exist_ok=True)
 
     def _ensure_path(self):
-        if str(BIN_DIR) not in os.environ["PATH"]:
+        # Compare whole PATH entries; a substring test also matched e.g. bin-old
+        path_set = {os.path.normcase(os.path.normpath(d))
+                    for d in os.environ.get("PATH", "").split(os.pathsep) if d}
+        if os.path.normcase(str(BIN_DIR)) not in path_set:
             Colors.print(f"WARNING: Add {BIN_DIR} to your PATH.", Colors.WARNING)
 
     def housekeeping(self) -> None:
@@ -1147,32 +2346,52 @@ class Anvil:
 
         # Clear contents of the build directory but keep the BUILD_DIR itself intact
         if BUILD_DIR.exists():
-            for child in BUILD_DIR.iterdir():
+            with os.scandir(BUILD_DIR) as it:
+                children = [(Path(e.path), e.is_dir()) for e in it]
+
+            def _clear(item: Tuple[Path, bool]) -> Optional[str]:
+                child, is_dir = item
                 try:
-                    if child.is_dir():
+                    if is_dir:
                         safe_rmtree(child)
                     else:
                         # remove files directly
                         child.unlink()
                 except (OSError, ValueError) as e:
-                    Colors.print(f"Failed to remove build entry {child}: {e}", Colors.WARNING)
+                    return f"Failed to remove build entry {child}: {e}"
+                return None
+
+            # Build trees are independent, so clear them concurrently; failures are
+            # reported afterwards in directory order.
+            with ThreadPoolExecutor(max_workers=max(1, min(_RMTREE_WORKERS, len(children)))) as ex:
+                failures = [msg for msg in ex.map(_clear, children) if msg]
+            for msg in failures:
+                Colors.print(msg, Colors.WARNING)
             Colors.print("Build directory cleaned.", Colors.OKGREEN)
 
-        # Remove orphaned binaries (only remove files that point to known install prefixes)
-        installed = {p.name for p in INSTALL_DIR.iterdir() if p.is_dir()}
+        # Remove orphaned binaries: shims whose target lies under INSTALL_DIR but no
+        # longer exists (package uninstalled or removed by hand). Shims are named after
+        # the binary, not the package, so ownership comes from the target; files in
+        # BIN_DIR that are not anvil shims are left alone.
+        install_roots = tuple({os.path.normcase(os.path.join(p, ''))
+                               for p in (os.fspath(INSTALL_DIR), os.path.realpath(INSTALL_DIR))})
         if BIN_DIR.exists():
-            for bin_file in BIN_DIR.iterdir():
-                if not bin_file.is_file():
+            with os.scandir(BIN_DIR) as it:
+                shims = [(e.path, e.name, e.is_symlink()) for e in it]
+            for path, shim_name, is_link in shims:
+                try:
+                    target = _shim_target(path, is_link)
+                except OSError:
                     continue
-                # On Windows we have shims like <name>.bat -> installed files; check stem
-                name = bin_file.stem
-                # Only remove the shim if it does NOT correspond to any installed package
-                if name not in installed:
-                    try:
-                        bin_file.unlink()
-                        Colors.print(f"Removed orphaned binary: {bin_file.name}", Colors.OKBLUE)
-                    except OSError as e:
-                        Colors.print(f"Failed to remove binary: {bin_file.name} ({e})", Colors.WARNING)
+                if target is None or not os.path.normcase(target).startswith(install_roots):
+                    continue
+                if os.path.exists(target):
+                    continue
+                try:
+                    os.unlink(path)
+                    Colors.print(f"Removed orphaned binary: {shim_name}", Colors.OKBLUE)
+                except OSError as e:
+                    Colors.print(f"Failed to remove binary: {shim_name} ({e})", Colors.WARNING)
         Colors.print("Housekeeping complete.", Colors.OKGREEN)
 
     def forge(self, target: str, msvc_runtime: Optional[str] = None, force_pic: Optional[bool] = None, check_release: bool = True) -> None:
@@ -1207,9 +2426,7 @@ class Anvil:
             git_dir = src_path / '.git'
             if git_dir.exists():
                 try:
-                    source_remote = run_cmd_output(
-                        'git config --get remote.origin.url', cwd=str(src_path)
-                    )
+                    source_remote = _git_remote_url(src_path)
                     if source_remote:
                         url = source_remote
                 except (FileNotFoundError, subprocess.CalledProcessError, OSError):
@@ -1243,17 +2460,17 @@ class Anvil:
         if os.path.exists(target) and os.path.isdir(target):
             # Local copy - use shutil for cross-platform copies instead of shell 'cp'
             Colors.print("Copying local source to build dir...", Colors.OKBLUE)
-            src_path = Path(target)
-            for item in src_path.iterdir():
-                dest = build_path / item.name
-                if item.is_dir():
-                    shutil.copytree(item, dest)
-                else:
-                    shutil.copy2(item, dest)
+            # Not hardlinks: build steps edit files in place, which would write
+            # through to the user's tree. _fast_copy2 reflinks where it can.
+            _copytree(target, build_path)
         else:
+            if url is None:
+                # Only local paths leave url unset, and those took the branch above
+                Colors.print(f"No source URL for '{target}'.", Colors.FAIL)
+                return
             # Git clone
             Colors.print("Cloning source...", Colors.OKBLUE)
-            run_cmd(f"git clone --depth 1 {url} .", cwd=build_path)
+            run_cmd(["git", "clone", "--depth", "1", url, "."], cwd=build_path)
 
         # Auto-Detect Build System
         steps, binaries, metadata = AutoBuilder.detect(build_path, install_path)
@@ -1262,6 +2479,7 @@ class Anvil:
         Colors.print("Forging (Building)...", Colors.OKBLUE)
         if install_path.exists():
             safe_rmtree(install_path)
+            _forget_install(name)
         install_path.mkdir(parents=True, exist_ok=True)
 
         # Prepare a platform-sensitive build env for all build steps so
@@ -1272,7 +2490,7 @@ class Anvil:
         force_pic_override = force_pic if force_pic is not None else metadata.get('force_pic')
         build_env = default_build_env(msvc_runtime_override=msvc_override, force_pic_override=force_pic_override)
         # Post-process CMake steps to inject MSVC runtime choice (if detected) so cmake call uses -D flag
-        if os.name == 'nt' and msvc_override:
+        if _IS_WIN and msvc_override:
             cmake_flag = 'MultiThreaded' if str(msvc_override).strip().upper() == 'MT' else 'MultiThreadedDLL'
             processed_steps = []
             for step in steps:
@@ -1281,24 +2499,64 @@ class Anvil:
                 elif isinstance(step, str) and 'cmake ' in step and 'CMAKE_MSVC_RUNTIME_LIBRARY' in step:
                     # Replace existing flag
                     step = re.sub(r"-DCMAKE_MSVC_RUNTIME_LIBRARY=[^\s]+", f"-DCMAKE_MSVC_RUNTIME_LIBRARY={cmake_flag}", step)
+                elif isinstance(step, list) and step[:1] == ['cmake'] and '-B' in step:
+                    # argv-form configure step: drop any existing runtime flag, then add ours
+                    step = [a for a in step if not a.startswith('-DCMAKE_MSVC_RUNTIME_LIBRARY=')]
+                    step.append(f"-DCMAKE_MSVC_RUNTIME_LIBRARY={cmake_flag}")
                 processed_steps.append(step)
             steps = processed_steps
-        if os.name == 'nt':
+        if _IS_WIN:
             Colors.print(f"Enforcing MSVC runtime in build environment (CL='{build_env.get('CL','')}', CMAKE_MSVC_RUNTIME_LIBRARY='{build_env.get('CMAKE_MSVC_RUNTIME_LIBRARY','')}')", Colors.OKBLUE)
 
+        try:
+            self._run_steps(steps, build_path, install_path, build_env)
+        finally:
+            _stat_cache.clear()
+
+        # Link Binaries (Heuristic + Explicit)
+        self._link_binaries(install_path, binaries)
+
+        # Cleanup
+        safe_rmtree(build_path)
+        _record_install(name, install_path)
+        Colors.print(f"Successfully forged {name}!", Colors.OKGREEN)
+        # If we installed from a git repo (URL or local git with a remote) and that remote
+        # isn't in the local index yet, auto-submit it to produce a PR for maintainers.
+        try:
+            final_url = None
+            if source_remote:
+                final_url = source_remote
+            elif url and (url.startswith('http') or url.startswith('git@')):
+                final_url = url
+            if self.auto_submit and final_url:
+                # add_local reports whether the URL was new, so no separate has_url lookup
+                sub_name = self._submission_name(final_url)
+                if self.index.add_local(sub_name, final_url):
+                    Colors.print(f"Repository {final_url} not found in index — submitting a PR to add it.", Colors.HEADER)
+                    Colors.print(f"Added '{sub_name}' to local index.", Colors.OKGREEN)
+                    self._print_submission_link(sub_name, final_url)
+        except (sqlite3.Error, subprocess.CalledProcessError, OSError, ValueError):
+            Colors.print("Auto submission failed; continuing without PR", Colors.WARNING)
+
+    @staticmethod
+    def _run_steps(steps: List[BuildStep], build_path: Path, install_path: Path, build_env: Dict[str, str]) -> None:
+        """Run a build plan in build_path: argv lists, shell strings and callables."""
         for step in steps:
-            # Step can be a string (shell command) or a callable (python function)
+            # Step can be a string (shell command), an argv list or a callable (python function)
             if callable(step):
                 step(build_path, install_path)
             else:
+                # A command may change the tree the copy helpers list
+                _stat_cache.clear()
                 # Replace known placeholders (e.g., {PREFIX}) with real paths
+                # Use forward slashes for paths in shell commands to avoid escaping issues
+                prefix_safe = str(install_path).replace('\\', '/')
+                rendered: Command
                 if isinstance(step, str):
-                    # Use forward slashes for paths in shell commands to avoid escaping issues
-                    prefix_safe = str(install_path).replace('\\', '/')
                     rendered = step.replace("{PREFIX}", prefix_safe)
                 else:
-                    rendered = step
-                Colors.print(f"Running: {rendered}")
+                    rendered = [str(arg).replace("{PREFIX}", prefix_safe) for arg in step]
+                Colors.print(f"Running: {_command_text(rendered)}")
                 try:
                     run_cmd(rendered, cwd=build_path, env=build_env)
                 except CommandExecutionError as cee:
@@ -1311,80 +2569,116 @@ class Anvil:
                     # Re-raise to keep existing behavior (exit or raise)
                     raise
 
-        # Link Binaries (Heuristic + Explicit)
-        self._link_binaries(install_path, binaries)
-
-        # Cleanup
-        safe_rmtree(build_path)
-        Colors.print(f"Successfully forged {name}!", Colors.OKGREEN)
-        # If we installed from a git repo (URL or local git with a remote) and that remote
-        # isn't in the local index yet, auto-submit it to produce a PR for maintainers.
-        try:
-            final_url = None
-            if source_remote:
-                final_url = source_remote
-            elif url and (url.startswith('http') or url.startswith('git@')):
-                final_url = url
-            if self.auto_submit and final_url and not self.index.has_url(final_url):
-                Colors.print(f"Repository {final_url} not found in index — submitting a PR to add it.", Colors.HEADER)
-                self.submit(final_url)
-        except (sqlite3.Error, subprocess.CalledProcessError, OSError, ValueError):
-            Colors.print("Auto submission failed; continuing without PR", Colors.WARNING)
-
     def _link_binaries(self, install_path, explicit_binaries):
         """
         Links explicit binaries AND scans for obvious executables.
         """
-        candidates = []
+        # Keyed by file name, the name of the BIN_DIR entry: the first source
+        # found for a name wins, and hidden files are dropped as they are found
+        candidates: Dict[str, Path] = {}
 
         # 1. Look in common bin folders
         for bin_folder in [install_path / "bin", install_path]:
-            if bin_folder.exists():
-                for f in bin_folder.iterdir():
-                    if f.is_file() and os.access(f, os.X_OK):
-                        candidates.append(f)
-                    elif f.suffix in ['.exe', '.bat', '.py', '.sh']: # Windows/Script check
-                        candidates.append(f)
-
-        # 2. Add explicit ones: look for files whose stem (name without extension) matches explicit names
-        for b in explicit_binaries:
-            for f in install_path.rglob('*'):
-                if f.is_file() and f.stem == b:
-                    candidates.append(f)
-
-        # 3. Link
-        for src in set(candidates):  # set for unique
-            if src.name.startswith("."):
-                # skip hidden
+            try:
+                with os.scandir(bin_folder) as it:
+                    for entry in it:
+                        if entry.name.startswith(".") or entry.name in candidates:
+                            continue
+                        if entry.is_file() and os.access(entry.path, os.X_OK):
+                            candidates[entry.name] = Path(entry.path)
+                        elif os.path.splitext(entry.name)[1] in ('.exe', '.bat', '.py', '.sh'): # Windows/Script check
+                            candidates[entry.name] = Path(entry.path)
+            except (FileNotFoundError, NotADirectoryError):
                 continue
 
-            dest = BIN_DIR / src.name
-            if dest.exists():
-                try:
-                    dest.unlink()
-                except PermissionError:
-                    # Try make writable then unlink
+        # 2. Add explicit ones: look for files whose stem (name without extension) matches explicit names.
+        # One walk of the install tree covers every explicit name.
+        explicit = set(explicit_binaries or ())
+        if explicit:
+            for entry in _scandir_recursive(install_path):
+                if (os.path.splitext(entry.name)[0] in explicit and not entry.name.startswith(".")
+                        and entry.is_file()):
+                    candidates.setdefault(entry.name, Path(entry.path))
+
+        # 3. Link
+        linked = 0
+        created: List[str] = []
+        linked_names: List[str] = []
+        for shim_name, src in candidates.items():
+            dest = BIN_DIR / shim_name
+            if _IS_WIN:
+                shim = str(dest) + ".bat"
+                content = f"@echo off\n\"{src}\" %*"
+                if dest.exists():
                     try:
-                        os.chmod(dest, stat.S_IWRITE)
                         dest.unlink()
-                    except OSError as e:
-                        Colors.print(f"Could not remove old link {dest}: {e}", Colors.WARNING)
+                    except PermissionError:
+                        # Try make writable then unlink
+                        try:
+                            os.chmod(dest, stat.S_IWRITE)
+                            dest.unlink()
+                        except OSError as e:
+                            Colors.print(f"Could not remove old link {dest}: {e}", Colors.WARNING)
+            else:
+                shim = str(dest)
+                content = str(src)
+            # Re-forging mostly finds the same shim: compare first, and when it
+            # differs swap the new one in atomically instead of unlink + create
+            try:
+                if _IS_WIN:
+                    with open(shim, encoding='utf-8') as f:
+                        unchanged = f.read() == content
+                else:
+                    unchanged = os.readlink(shim) == content
+            except (OSError, UnicodeDecodeError):
+                unchanged = False
+            if not unchanged:
+                tmp = shim + ".anvil-tmp"
+                try:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(tmp)
+                    if _IS_WIN:
+                        # Windows Shim
+                        with open(tmp, 'w', encoding='utf-8') as bat:
+                            bat.write(content)
+                    else:
+                        os.symlink(content, tmp)
+                    os.replace(tmp, shim)
+                except OSError as e:
+                    Colors.print(f"Could not link {shim}: {e}", Colors.WARNING)
+                    with contextlib.suppress(OSError):
+                        os.unlink(tmp)
+                    continue
+            linked += 1
+            created.append(shim)
+            linked_names.append(src.name)
+        Colors.details("Linking %s...", linked_names)
+        # Record what was created so uninstall need not scan all of BIN_DIR
+        try:
+            (install_path / _SHIM_MANIFEST).write_text("".join(f"{p}\n" for p in created), encoding='utf-8')
+        except OSError as e:
+            logger.debug("Could not write shim manifest for %s: %s", install_path, e)
+        if linked:
+            Colors.print(f"Linked {linked} executable(s) into {BIN_DIR}", Colors.OKBLUE)
 
-            Colors.print(f"Linking {src.name}...", Colors.OKBLUE)
-            if os.name == 'nt':
-                # Windows Shim
-                with open(str(dest) + ".bat", 'w', encoding='utf-8') as bat:
-                    bat.write(f"@echo off\n\"{src}\" %*")
+    @staticmethod
+    def _submission_name(url: str) -> str:
+        return url.split("/")[-1].replace(".git", "")
 
     def submit(self, url):
         """Simple submission: Just URL and Name."""
-        name = url.split("/")[-1].replace(".git", "")
+        name = self._submission_name(url)
 
         # 1. Add Locally
         self.index.add_local(name, url)
         Colors.print(f"Added '{name}' to local index.", Colors.OKGREEN)
 
         # 2. Generate PR Link
+        self._print_submission_link(name, url)
+
+    @staticmethod
+    def _print_submission_link(name: str, url: str) -> None:
+        """Print the prefilled GitHub 'new file' link that proposes `url` to the central index."""
         payload = {"name": name, "url": url}
         json_content = json.dumps(payload, indent=2)
         base = "https://github.com/sycomix/Anvil_Index/new/main"
@@ -1407,64 +2701,151 @@ class Anvil:
             return
         
         Colors.print(f"Found {len(results)} packages:", Colors.HEADER)
+        bold, end = (Colors.BOLD, Colors.ENDC) if Colors._USE_COLOR else ('', '')
         for name, desc, url in results:
-            print(f"{Colors.BOLD}{name}{Colors.ENDC} - {desc} ({url})")
+            print(f"{bold}{name}{end} - {desc} ({url})")
 
     def uninstall(self, name):
         """Remove a package and its binaries."""
         install_path = INSTALL_DIR / name
         if not install_path.exists():
+            _forget_install(name)
             Colors.print(f"Package '{name}' is not installed.", Colors.FAIL)
             return
 
         Colors.print(f"Uninstalling {name}...", Colors.HEADER)
         
-        # 1. Remove linked binaries
-        # We check BIN_DIR for any symlinks or shims that point into the install_path.
-        count = 0
-        for bin_file in BIN_DIR.iterdir():
-            if not bin_file.is_file():
-                continue
-            
-            should_remove = False
+        # 1. Collect linked binaries
+        # Installs linked by _link_binaries list their shims in a manifest; older ones
+        # fall back to checking BIN_DIR for any symlinks or shims that point into the
+        # install_path. Manifest entries are still checked, since a later package may
+        # have relinked the same name.
+        candidates: List[Tuple[str, bool]] = []
+        # No BIN_DIR (fresh setup, or removed by hand): nothing can be linked
+        if os.path.isdir(BIN_DIR):
             try:
-                # Windows .bat shim check
-                if os.name == 'nt' and bin_file.suffix.lower() == '.bat':
-                    try:
-                        # Read the batch file to see if it points to our install dir
-                        content = bin_file.read_text(encoding='utf-8', errors='ignore')
-                        # Simple check: does the unique install path string appear in the bat file?
-                        # We use the absolute path string.
-                        if str(install_path.resolve()) in content or str(install_path) in content:
-                            should_remove = True
-                    except OSError:
-                        pass
-                
-                # Unix symlink check
-                elif bin_file.is_symlink():
-                    target = bin_file.resolve()
-                    # Check if target is inside install_path
-                    # pathlib.Path.is_relative_to() is available in Python 3.9+
-                    # We'll use string check for compatibility or try/except
-                    if str(install_path.resolve()) in str(target):
-                        should_remove = True
-
-                if should_remove:
-                    bin_file.unlink()
-                    Colors.print(f"Removed shim/link: {bin_file.name}", Colors.OKBLUE)
-                    count += 1
-
+                manifest = (install_path / _SHIM_MANIFEST).read_text(encoding='utf-8').splitlines()
+            except OSError:
+                try:
+                    with os.scandir(BIN_DIR) as it:
+                        # Only .bat shims (Windows) and symlinks can point into install_path;
+                        # the name and is_symlink() come from the d_type that getdents64
+                        # already returned, so other entries cost no syscalls. is_file()
+                        # follows links, skipping broken ones.
+                        for e in it:
+                            is_link = e.is_symlink()
+                            if (is_link or (_IS_WIN and e.name.lower().endswith('.bat'))) and e.is_file():
+                                candidates.append((e.path, is_link))
+                except FileNotFoundError:
+                    pass
+            else:
+                candidates = [(p, os.path.islink(p)) for p in manifest if p and os.path.isfile(p)]
+        install_str = os.fspath(install_path)
+        # Resolved once: realpath stats every component of the install path.
+        # normcase: Windows paths compare case-insensitively, either slash direction.
+        # Compared as path prefixes, so uninstalling foo leaves foobar's shims alone.
+        shim_needles = {os.path.normcase(install_str), os.path.normcase(os.path.realpath(install_str))}
+        shim_prefixes = tuple(os.path.join(n, '') for n in shim_needles)
+
+        def _check(item: Tuple[str, bool]) -> Tuple[str, bool, Optional[OSError]]:
+            """Return (path, points into install_path, error) for one shim/link."""
+            path, is_link = item
+            try:
+                target = _shim_target(path, is_link)
             except OSError as e:
-                Colors.print(f"Error checking {bin_file.name}: {e}", Colors.WARNING)
-
-        # 2. Remove package directory
-        safe_rmtree(install_path)
+                return path, False, e
+            if target is None:
+                return path, False, None
+            target = os.path.normcase(target)
+            return path, target in shim_needles or target.startswith(shim_prefixes), None
+
+        def _remove_owned() -> Tuple[List[str], List[str]]:
+            """Unlink the owned shims; return (removed names, error messages).
+
+            Runs beside safe_rmtree on another thread, so it prints nothing itself:
+            the caller reports both lists from the main thread.
+            """
+            # The checks are independent file reads/readlinks, so overlap them on a pool;
+            # unlinking stays sequential and in candidate order.
+            if len(candidates) >= _PARALLEL_SHIM_MIN:
+                with ThreadPoolExecutor(max_workers=min(_SHIM_CHECK_WORKERS, len(candidates))) as ex:
+                    results = list(ex.map(_check, candidates))
+            else:
+                results = [_check(c) for c in candidates]
+            # Unlink relative to an open BIN_DIR fd so the kernel resolves only the leaf
+            bin_dir = os.fspath(BIN_DIR)
+            dir_fd = None
+            if os.unlink in os.supports_dir_fd:
+                try:
+                    dir_fd = os.open(bin_dir, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+                except OSError:
+                    pass
+            removed: List[str] = []
+            errors: List[str] = []
+            try:
+                for path, owned, err in results:
+                    shim_name = os.path.basename(path)
+                    if owned and err is None:
+                        try:
+                            if dir_fd is not None and os.path.dirname(path) == bin_dir:
+                                os.unlink(shim_name, dir_fd=dir_fd)
+                            else:
+                                os.unlink(path)
+                            removed.append(shim_name)
+                        except OSError as e:
+                            err = e
+                    if err is not None:
+                        errors.append(f"Error checking {shim_name}: {err}")
+            finally:
+                if dir_fd is not None:
+                    os.close(dir_fd)
+            return removed, errors
+
+        # 2. Remove linked binaries and the package directory. Ownership checks need
+        # only the shim contents and link strings, and candidates were filtered while
+        # their targets still existed, so both removals can overlap.
+        removed: List[str] = []
+        if candidates:
+            with ThreadPoolExecutor(max_workers=1) as ex:
+                shims = ex.submit(_remove_owned)
+                safe_rmtree(install_path)
+                removed, errors = shims.result()
+            Colors.details("Removed shim/link: %s", removed)
+            for msg in errors:
+                Colors.print(msg, Colors.WARNING)
+        else:
+            safe_rmtree(install_path)
+        if removed:
+            Colors.print(f"Removed {len(removed)} shim(s)/link(s)", Colors.OKBLUE)
+        _forget_install(name)
         Colors.print(f"Successfully uninstalled {name}.", Colors.OKGREEN)
 
 
-def main():
+def _list_installed(anvil: "Anvil", args: argparse.Namespace) -> None:
+    with os.scandir(INSTALL_DIR) as it:
+        names = [e.name for e in it]
+    if names:
+        # One write for the whole listing instead of a print() per package
+        sys.stdout.write("\n".join(names) + "\n")
+
+
+def _index_check(anvil: "Anvil", args: argparse.Namespace) -> None:
+    ok, issues = anvil.index.check()
+    if ok:
+        Colors.print("Local index looks healthy.", Colors.OKGREEN)
+    else:
+        Colors.print("Local index has issues:", Colors.WARNING)
+        for i in issues:
+            Colors.print(f" - {i}", Colors.WARNING)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser (once per process; reused by repeated main() calls)."""
     parser = argparse.ArgumentParser(description="Anvil: Source Forge")
+    parser.add_argument("-v", "--verbose", action='store_true', help="Show per-file progress (debug logging)")
     subparsers = parser.add_subparsers(dest="command")
+    # Each subcommand stores its handler as `func(anvil, args)`
 
     # FORGE: The main tool. Accepts Name, URL, or Path.
     forge_parser = subparsers.add_parser("forge", help="Install from Index, URL, or Path")
@@ -1472,60 +2853,52 @@ def main():
     forge_parser.add_argument("--msvc-runtime", choices=['MD', 'MT'], help="Override MSVC runtime used for builds (MD or MT)")
     forge_parser.add_argument("--force-pic", action='store_true', help="Force -fPIC on POSIX builds (overrides env/meta)")
     forge_parser.add_argument("--no-release-check", action='store_true', help="Disable GitHub release check; force build from source")
+    forge_parser.set_defaults(func=lambda anvil, a: anvil.forge(a.target, msvc_runtime=a.msvc_runtime, force_pic=a.force_pic, check_release=not a.no_release_check))
 
     # SUBMIT: Add to index
-    subparsers.add_parser("submit", help="Add URL to index").add_argument("url")
+    submit_parser = subparsers.add_parser("submit", help="Add URL to index")
+    submit_parser.add_argument("url")
+    submit_parser.set_defaults(func=lambda anvil, a: anvil.submit(a.url))
 
     # SEARCH
-    subparsers.add_parser("search", help="Search for packages").add_argument("query")
+    search_parser = subparsers.add_parser("search", help="Search for packages")
+    search_parser.add_argument("query")
+    search_parser.set_defaults(func=lambda anvil, a: anvil.search(a.query))
 
     # UNINSTALL
-    subparsers.add_parser("uninstall", help="Uninstall a package").add_argument("name")
+    uninstall_parser = subparsers.add_parser("uninstall", help="Uninstall a package")
+    uninstall_parser.add_argument("name")
+    uninstall_parser.set_defaults(func=lambda anvil, a: anvil.uninstall(a.name))
 
-    subparsers.add_parser("update", help="Update index")
-    subparsers.add_parser("list", help="List installed")
+    subparsers.add_parser("update", help="Update index").set_defaults(func=lambda anvil, a: anvil.index.update())
+
+    subparsers.add_parser("list", help="List installed").set_defaults(func=_list_installed)
 
     # Index maintenance (repair/check)
     index_parser = subparsers.add_parser("index", help="Index maintenance commands")
     index_sub = index_parser.add_subparsers(dest="index_cmd")
-    index_sub.add_parser("repair", help="Repair local index (reclone)")
-    index_sub.add_parser("check", help="Check local index health and report issues")
-
-    subparsers.add_parser("housekeeping", help="Clean up builds and binaries")
-
-    args = parser.parse_args()
-    anvil = Anvil()
-
-    if args.command == "forge":
-        anvil.forge(args.target, msvc_runtime=args.msvc_runtime, force_pic=args.force_pic, check_release=not getattr(args, 'no_release_check', False))
-    elif args.command == "submit":
-        anvil.submit(args.url)
-    elif args.command == "search":
-        anvil.search(args.query)
-    elif args.command == "uninstall":
-        anvil.uninstall(args.name)
-    elif args.command == "update":
-        anvil.index.update()
-    elif args.command == "index":
-        if getattr(args, 'index_cmd', None) == 'repair':
-            anvil.index.repair()
-        elif getattr(args, 'index_cmd', None) == 'check':
-            ok, issues = anvil.index.check()
-            if ok:
-                Colors.print("Local index looks healthy.", Colors.OKGREEN)
-            else:
-                Colors.print("Local index has issues:", Colors.WARNING)
-                for i in issues:
-                    Colors.print(f" - {i}", Colors.WARNING)
-        else:
-            parser.print_help()
-    elif args.command == "list":
-        for p in INSTALL_DIR.iterdir():
-            print(p.name)
-    elif args.command == "housekeeping":
-        anvil.housekeeping()
-    else:
+    index_sub.add_parser("repair", help="Repair local index (reclone)").set_defaults(func=lambda anvil, a: anvil.index.repair())
+    index_sub.add_parser("check", help="Check local index health and report issues").set_defaults(func=_index_check)
+
+    subparsers.add_parser("housekeeping", help="Clean up builds and binaries").set_defaults(func=lambda anvil, a: anvil.housekeeping())
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, anvil: Optional[Anvil] = None) -> None:
+    """CLI entry point. In-process drivers can pass `argv` and reuse one `anvil`."""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+    if anvil is None:
+        anvil = Anvil()
+
+    func = getattr(args, 'func', None)
+    if func is None:
+        # No subcommand, or `index` without repair/check
         parser.print_help()
+    else:
+        func(anvil, args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file